@@ -1,27 +1,23 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import requests
-import time
-from bs4 import BeautifulSoup
 from streamlit_lottie import st_lottie
+from utils.assets import load_lottie
+from utils.ingest import archive_members, dtype_report, excel_sheets, load_dataset, load_sheets
+from utils.streaming_stats import DATA_DIR, data_file, summarize_file
+from utils.table_parser import extract_tables
+from utils.type_inference import infer_types
+from utils.web_fetch import web_fetcher
 
 # ------------------- Extract From Web ------------------ #
 # Function to extract tables from a webpage
-def Func(webpage):
-    soup = BeautifulSoup(webpage.content, "html.parser")
-    list_of_tables = list(soup.find_all("table"))
-    list_of_trs = []
-    for i in list_of_tables:
-        list_of_trs.append(i.find_all("tr"))
-    return list_of_trs
-
-def Extract(URL, HEADERS={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/132.0.0.0 Safari/537.36', 'Accept-Language': 'en-US, en;q=0.5'}):
-    webpage = requests.get(URL, headers=HEADERS)
-    if webpage.status_code == 200:
-        return Func(webpage)
+def Extract(URL):
+    # Pooled session with timeouts; unchanged pages are revalidated against the on-disk cache
+    result = web_fetcher.fetch(URL)
+    if result.ok:
+        return result.content
     else:
-        st.error("Failed to fetch webpage content")
+        st.error(f"Failed to fetch webpage content: {result.error}")
         return None
 
 # def WebScrape(url):
@@ -49,79 +45,112 @@ def Extract(URL, HEADERS={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x6
 #     return dict_dfs
 # Modified WebScrape function
 def WebScrape(url):
+    # Only <table> subtrees are parsed; row/column spans and multi-row headers are expanded
+    content = Extract(url)
+    if content is None:
+        return {}
+    return extract_tables(content)
+
+def WebScrapeMany(urls):
+    # Pages are fetched concurrently; tables are named after the page they came from
     result = {}
-    m = 1
-    list_of_trs = Extract(url)
-    if list_of_trs:
-        for k in list_of_trs:
-            headers = []
-            rows = []
-            for i in k:
-                ths = [th.text.strip() for th in i.find_all("th")]
-                if ths:
-                    headers = ths  # Take the header row
-                else:
-                    data = [td.text.strip() for td in i.find_all("td")]
-                    if data:
-                        rows.append(data)
-            index = "table" + str(m)
-            result[index] = (headers, rows)
-            m += 1
+    for n, fetched in enumerate(web_fetcher.fetch_many(urls), start=1):
+        if not fetched.ok:
+            st.error(f"Failed to fetch {fetched.url}: {fetched.error}")
+            continue
+        for name, table in extract_tables(fetched.content).items():
+            result[f"page{n}_{name}"] = table
     return result
 
 # Modified GetDfs function
 def GetDfs(result):
     dict_dfs = {}
+    st.session_state.table_types = {}
     for k in result:
         headers, rows = result[k]
         if headers:  # If headers are found, use them
             df = pd.DataFrame(rows, columns=headers)
         else:  # Else fallback to default
             df = pd.DataFrame(rows)
+        # Numbers, percentages, currency and dates arrive as text; convert them column by column
+        st.session_state.table_types[k] = infer_types(df)
         dict_dfs[k] = df
     return dict_dfs
 
 # ----------------------------------------------------------- #
 
-def load_lottie_url(url):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
-
 # Streamlit UI
 st.title("Data Acquisition")
 
 # Dropdown to select data source
-option = st.selectbox("Choose Data Source", ["Upload File", "Get Data from Web"])
+option = st.selectbox("Choose Data Source", ["Upload File", "Get Data from Web", "Summarize Large File"])
 
 if option == "Upload File":
     st.header("Upload Files")
-    uploaded_file = st.file_uploader("Choose Your File", type=['csv', 'xlsx', 'txt'])
+    uploaded_file = st.file_uploader("Choose Your File", type=['csv', 'xlsx', 'txt', 'tsv', 'gz', 'bz2', 'xz', 'zst', 'zip'])
 
     if uploaded_file is not None:
+        upload_options = {}
+        members = archive_members(uploaded_file)
+        if len(members) > 1:
+            # Each table in the archive is decompressed on its own when it is picked
+            upload_options = {"member": st.selectbox("Select a table from the archive:", members)}
+        elif uploaded_file.name.endswith('xlsx'):
+            # Sheet names and sizes come from workbook metadata, without loading any cells
+            sheets = excel_sheets(uploaded_file)
+            labels = {s['name']: f"{s['name']} (~{s['rows']:,} rows)" if s['rows'] else s['name'] for s in sheets}
+            selected = st.multiselect("Select sheets to load", list(labels), default=list(labels)[:1], format_func=labels.get)
+            if len(selected) > 1:
+                with st.spinner(f"Parsing {len(selected)} sheets in parallel..."):
+                    load_sheets(uploaded_file, selected)
+            active_sheet = st.selectbox("Select a sheet to analyse:", selected) if selected else None
+            if active_sheet:
+                upload_options = {"sheet": active_sheet}
+        st.session_state.upload_options = upload_options
+
         progress_container = st.empty()
         bar = progress_container.progress(0)
-
-        for percent_complete in range(100):
-            time.sleep(0.01)
-            bar.progress(percent_complete + 1)
+        preview_container = st.empty()
+
+        def show_progress(bytes_read, total_bytes, rows):
+            fraction = bytes_read / total_bytes if total_bytes else 1.0
+            bar.progress(min(fraction, 1.0), text=f"{bytes_read / 1024**2:.1f} of {total_bytes / 1024**2:.1f} MB read, {rows:,} rows")
+
+        def show_preview(chunk):
+            with preview_container.container():
+                st.write("#### Preview")
+                st.dataframe(chunk.head(50))
+
+        try:
+            # Parsed once here; the Analyse page gets the same frame back from the dataset cache
+            load_dataset(uploaded_file, upload_options, on_progress=show_progress, on_chunk=show_preview)
+        except ValueError as e:
+            st.error(str(e))
+
+        report = dtype_report(uploaded_file, upload_options)
+        if report is not None:
+            before_mb = report['bytes_before'].sum() / 1024**2
+            after_mb = report['bytes_after'].sum() / 1024**2
+            with st.expander(f"Memory: {before_mb:.1f} MB → {after_mb:.1f} MB after type optimisation"):
+                st.dataframe(report)
 
         st.session_state["uploaded_file"] = uploaded_file 
         st.success("File Uploaded")
         anim_placeholder = st.empty()
-        anim = load_lottie_url("https://lottie.host/a9bdf4d8-ce93-46e7-85dd-01937e872f64/rBFm9SBGgF.json")
-        st_lottie(anim, height=100, key="done")
+        anim = load_lottie("upload_done")
+        if anim:
+            st_lottie(anim, height=100, key="done")
         progress_container.empty()
 
 elif option == "Get Data from Web":
     st.header("Get Data from Web")
-    url = st.text_input("Enter URL to scrape tables:", "")
+    url_text = st.text_area("Enter URLs to scrape tables (one per line):", "")
+    urls = list(dict.fromkeys(line.strip() for line in url_text.splitlines() if line.strip()))
 
     if st.button("Extract Tables"):
-        if url:
+        if urls:
             with st.spinner("Extracting tables..."):
-                data = WebScrape(url)
+                data = WebScrape(urls[0]) if len(urls) == 1 else WebScrapeMany(urls)
                 if data:
                     dict_dfs = GetDfs(data)
                     st.session_state.tables_extracted = dict_dfs
@@ -129,7 +158,7 @@ elif option == "Get Data from Web":
                 else:
                     st.error("No tables found on the page.")
         else:
-            st.warning("Please enter a valid URL.")
+            st.warning("Please enter at least one valid URL.")
 
     if "tables_extracted" in st.session_state and st.session_state.tables_extracted:
         table_options = list(st.session_state.tables_extracted.keys())
@@ -140,3 +169,24 @@ elif option == "Get Data from Web":
             st.session_state.selected_df = st.session_state.tables_extracted[selected_table]
             st.subheader(f"{selected_table}")
             st.dataframe(st.session_state.selected_df)
+            kinds = st.session_state.get("table_types", {}).get(selected_table)
+            if kinds:
+                st.caption("Detected types: " + ", ".join(f"{col} ({kind})" for col, kind in kinds.items()))
+
+elif option == "Summarize Large File":
+    st.header("Summarize Large File")
+    # The file is read from disk in chunks and never loaded into the session
+    path = st.text_input(f"CSV or TSV file in {DATA_DIR}:", "")
+    workers = st.number_input("Worker processes", min_value=1, max_value=64, value=4)
+    if st.button("Summarize"):
+        status = st.empty()
+        try:
+            with st.spinner("Summarizing..."):
+                summary = summarize_file(data_file(path.strip()), int(workers),
+                                         on_progress=lambda rows: status.text(f"{rows:,} rows read"))
+        except (OSError, ValueError) as e:
+            st.error(f"Could not summarize the file: {e}")
+        else:
+            status.empty()
+            st.success(f"Summarized {summary.rows:,} rows. Quartiles are approximate.")
+            st.dataframe(summary.to_frame())
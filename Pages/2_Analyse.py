@@ -1,277 +1,546 @@
+import json
 import streamlit as st
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-import requests
 from streamlit_lottie import st_lottie
-from scipy import stats
+from scipy import stats as scipy_stats
 from sklearn.linear_model import LinearRegression
+from utils.analysis_cache import AnalysisCache
+from utils.assets import load_lottie
+from utils.bootstrap import METHODS as BOOTSTRAP_METHODS, STATISTICS as BOOTSTRAP_STATISTICS, bootstrap
+from utils.bulk_replace import is_text_column, preview as bulk_preview
+from utils.cleaning import apply_step
+from utils.dataset_cache import dataset_cache, dataset_key
+from utils.dataset_version import bump_version, dataset_identity, reset_version
+from utils.duplicates import (BLOCKING, KEEP, MAX_GROUPS, duplicate_groups, near_duplicate_clusters,
+                               near_duplicate_groups)
+from utils.history import History
+from utils.ingest import load_dataset
+from utils.pipeline import LazyPipeline, PipelineError
+from utils.preview import PAGE_SIZES, PreviewCache
+from utils.recipe import PIPELINE, STEP_OPS, Recipe, recipe_store
+from utils.row_filter import NO_VALUE, OPERATORS
+from utils.top_k import top_k
+from utils.type_conversion import LOCALES, TYPES, convert
+from utils import stats
 
 # Load Lottie animation
-def load_lottie_url(url):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
-
-anim = load_lottie_url("https://lottie.host/524288b4-4896-4182-918f-16a8904579d9/1OjzOkf3OG.json")
+anim = load_lottie("cleaning")
 
 # Function to initialize the DataFrame in session state
-def init_dataframe(file):
-    if file.name.endswith('csv'):
-        df = pd.read_csv(file)
-    elif file.name.endswith('txt'):
-        df = pd.read_csv(file, delimiter="\t")
-    elif file.name.endswith('xlsx'):
-        df = pd.read_excel(file)
-    else:
-        st.error("Unsupported File Format!")
+def init_dataframe(file, options=None):
+    try:
+        # The cache hands back a shared frame, so the session works on its own copy
+        return load_dataset(file, options).copy()
+    except ValueError as e:
+        st.error(str(e))
         return None
-    return df
 
 if 'uploaded_file' in st.session_state :
     file = st.session_state["uploaded_file"]
-    st.session_state.df = init_dataframe(file)  # Ensure it's always updated
+    options = st.session_state.get("upload_options")
+    key = dataset_key(file, options)
+    if st.session_state.get("df_key") != key or st.session_state.get("df") is None:
+        st.session_state.df = init_dataframe(file, options)  # Only re-load when the file bytes change
+        st.session_state.df_key = key
+        st.session_state.history = History()
+        reset_version(st.session_state)
 
 elif 'selected_df' in st.session_state :
-    st.session_state.df = st.session_state.selected_df  # Ensure web-extracted table updates
+    if st.session_state.get("df_source") is not st.session_state.selected_df or st.session_state.get("df") is None:
+        st.session_state.df = st.session_state.selected_df.copy()  # Ensure web-extracted table updates
+        st.session_state.df_source = st.session_state.selected_df
+        st.session_state.history = History()
+        reset_version(st.session_state)
 
 else:
     st.warning("No table selected. Please go to the Upload page or extract a table from the web first.")
 
 df = st.session_state.get("df")
+cache_stats = dataset_cache.stats()
+st.sidebar.caption(f"Dataset cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+                   f"{cache_stats['bytes'] / 1024**2:.1f} MB in {cache_stats['entries']} entries")
+# Previews send one page of rows at a time; sort, search and the pages themselves are cached per dataset version
+if 'preview_cache' not in st.session_state:
+    st.session_state.preview_cache = PreviewCache()
+# Analysis results and figures are reused until a cleaning step changes the data
+if 'analysis_cache' not in st.session_state:
+    st.session_state.analysis_cache = AnalysisCache()
+analysis_stats = st.session_state.analysis_cache.stats()
+st.sidebar.caption(f"Analysis cache: {analysis_stats['hits']} hits / {analysis_stats['misses']} misses, "
+                   f"{analysis_stats['entries']} results")
+
+def memo(op, compute, *args):
+    return st.session_state.analysis_cache.get(dataset_identity(st.session_state), op, args, compute)
+
+def show_frame(frame, key):
+    cache = st.session_state.preview_cache
+    identity = dataset_identity(st.session_state)
+    columns = list(frame.columns)
+    search_col, in_col, sort_col, order_col = st.columns([2, 1, 1, 1])
+    with search_col:
+        query = st.text_input("Search", key=f"{key}_search", placeholder="Find text in any column")
+    with in_col:
+        search_in = st.selectbox("In Column", ["All columns"] + columns, key=f"{key}_search_in")
+    with sort_col:
+        sort = st.selectbox("Sort By", ["None"] + columns, key=f"{key}_sort")
+    with order_col:
+        order = st.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order")
+    spec = (None if sort == "None" else sort, order == "Ascending", query.strip(),
+            None if search_in == "All columns" else search_in)
+
+    rows = cache.rows(identity, frame, spec)
+    size_col, page_col, info_col = st.columns([1, 1, 3])
+    with size_col:
+        size = st.selectbox("Rows Per Page", PAGE_SIZES, index=2, key=f"{key}_size")
+    pages = max(1, -(-rows // size))
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages  # The frame or the search result got shorter
+    with page_col:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    st.dataframe(cache.page(identity, frame, spec, page - 1, size))
+    with info_col:
+        start = (page - 1) * size
+        st.caption(f"Rows {min(start + 1, rows):,}-{min(start + size, rows):,} of {rows:,}"
+                   + (f" matching '{spec[2]}'" if spec[2] else "") + f" ({len(frame):,} total)")
+
 if df is not None:
     st.write("### Data")
-    st.dataframe(df)
+    show_frame(df, "data")
 else:
     st.error("Data not loaded.")
 
 # Initialize history in session state
-if 'history' not in st.session_state:
-    st.session_state.history = []
+if not isinstance(st.session_state.get('history'), History):
+    st.session_state.history = History()
+# The recipe outlives reloads so it can be replayed on the next file
+if not isinstance(st.session_state.get('recipe'), Recipe):
+    st.session_state.recipe = Recipe()
+    st.session_state.recipe_redo = []
+if not isinstance(st.session_state.get('pending'), LazyPipeline):
+    st.session_state.pending = LazyPipeline()
 
 # Data cleaning functions
-def save_state():
-    st.session_state.history.append(st.session_state.df.copy())
+def replace_df(new_df):
+    # Row-changing steps produce a new frame; keep the page and session pointing at the same one
+    global df
+    df = new_df
+    st.session_state.df = new_df
+    bump_version(st.session_state)
+
+def run_step(op, **args):
+    # Every cleaning action goes through here so it is undoable and recorded in the recipe
+    if st.session_state.get("lazy_mode"):
+        st.session_state.pending.add(op, **args)
+        st.info(f"Queued {op}; {len(st.session_state.pending)} steps pending. Run the pipeline to apply them.")
+        return None
+    try:
+        new_df, change = apply_step(df, {"op": op, "args": args}, st.session_state.history)
+    except ValueError as e:
+        st.error(str(e))
+        return None
+    replace_df(new_df)
+    st.session_state.recipe.add(op, **args)
+    st.session_state.recipe_redo = []
+    return change
 
 def undo_last_action():
     if st.session_state.history:
-        st.session_state.df = st.session_state.history.pop()
+        replace_df(st.session_state.history.undo(df))
+        step = st.session_state.recipe.pop()
+        if step is not None:
+            st.session_state.recipe_redo.append(step)
         st.success("Last action undone.")
     else:
         st.warning("No actions to undo.")
 
+def redo_last_action():
+    if st.session_state.history.can_redo:
+        replace_df(st.session_state.history.redo(df))
+        if st.session_state.recipe_redo:
+            st.session_state.recipe.steps.append(st.session_state.recipe_redo.pop())
+        st.success("Action redone.")
+    else:
+        st.warning("No actions to redo.")
+
 def drop_cols(column_name):
-    if column_name in df.columns:
-        save_state()  # Save current state before making changes
-        df.drop(columns=column_name, inplace=True)
+    if run_step("drop_columns", columns=[column_name]):
         st.success(f"Dropped column: {column_name}")
-    else:
-        st.error(f"Column '{column_name}' does not exist.")
 
 def trim(a, col_name, expr):
-    if col_name in df.columns and isinstance(df[col_name][0], str):
-        save_state()  # Save current state before making changes
-        if a == 'Right':
-            df[col_name] = df[col_name].str.rstrip(expr)
-        elif a == 'Left':
-            df[col_name] = df[col_name].str.lstrip(expr)
-        elif a == 'Both':
-            df[col_name] = df[col_name].str.strip(expr)
-        else:
-            st.error("Please enter valid input!")
-    else:
-        st.error("Please ensure the column exists and is a string type.")
+    return run_step("strip", column=col_name, side=a, chars=expr)
 
 def SetIndex(column_name):
-    save_state()
-    df.set_index(column_name,inplace=True)
+    return run_step("set_index", column=column_name)
 
-def DropDuplicates():
-    save_state()
-    df.drop_duplicates(inplace=True)
+def DropDuplicates(subset=None, keep="first"):
+    change = run_step("drop_duplicates", subset=subset or None, keep=keep)
+    return None if change is None else len(change.drop_rows)
+
+def DropNearDuplicates(columns, threshold, blocking):
+    change = run_step("drop_near_duplicates", columns=columns, threshold=threshold, blocking=blocking)
+    return None if change is None else len(change.drop_rows)
+
+def ShowDuplicateGroups(summary, rows, label):
+    if summary.empty:
+        st.info(f"No {label} found.")
+        return
+    extra = int(summary["rows"].sum() - len(summary))
+    st.write(f"{len(summary):,} groups of {label}; dropping keeps one row per group and removes {extra:,} rows.")
+    st.caption(f"Largest {min(len(summary), MAX_GROUPS)} groups:")
+    st.dataframe(rows)
 
 def Replace(old_expr,new_expr,column_name):
-    if(isinstance(df[column_name][0], str)):
-       save_state()
-       df[column_name] = df[column_name].str.replace(old_expr,new_expr,regex=True)
-    else:
-        st.error("Please Convert the Column to String First")
+    return run_step("replace", column=column_name, pattern=old_expr, replacement=new_expr)
+
+def BulkReplace(rules):
+    return run_step("bulk_replace", rules=rules)
+
+def PreviewBulkReplace(rules):
+    # Dry run: nothing changes, only the match counts per rule and column are shown
+    try:
+        counts = bulk_preview(df, rules)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if counts.empty:
+        st.info("No text columns matched the rules.")
+        return
+    st.dataframe(counts, hide_index=True)
+    st.caption(f"{counts['cells_matched'].sum():,} matched cells, {counts['replacements'].sum():,} replacements. "
+               "Examples show each rule on its own; rules run in order when applied.")
+
+def rules_from_editor(rules_df):
+    rules = []
+    for row in rules_df.itertuples(index=False):
+        if isinstance(row.pattern, str) and row.pattern:
+            rules.append({
+                "pattern": row.pattern,
+                "replacement": row.replacement if isinstance(row.replacement, str) else "",
+                "columns": [c.strip() for c in str(row.columns or "").split(",") if c.strip()],
+                "ignore_case": bool(row.ignore_case),
+                "literal": bool(row.literal),
+            })
+    return rules
 
 def Fillna(val):
-    save_state()
-    df.fillna(val,inplace=True)
+    return run_step("fillna", value=val)
 
 def dropNA():
-    save_state()
-    df.dropna(inplace=True)
+    return run_step("dropna")
 
-def DropRowIf(column_name,expr):
-    save_state()
-    for x in df.index:
-      if df.loc[x,column_name] == expr:
-         df.drop(x,inplace = True) 
+def DropRowIf(column_name, operator, expr="", upper=""):
+    # One boolean-mask pass; the typed value is coerced to the column's dtype first
+    change = run_step("drop_rows", column=column_name, operator=operator, value=expr, upper=upper)
+    return None if change is None else len(change.drop_rows)
 
 def ResetIndex():
-    save_state()
-    df = df.reset_index(drop=True)
-
-def ChangeTypeCol(col_name, change):
-    save_state()
-    
-    if change == 'str':
-        df[col_name] = df[col_name].astype(str)
-        st.success("Changed Successfully!")
-
-    elif change == 'int':
-        try:
-            df[col_name] = pd.to_numeric(df[col_name], errors='coerce')
-            df[col_name] = df[col_name].fillna(0).astype(int)
-            
-        except Exception as e:
-            st.error(f"Conversion to integer failed. Check for non-numeric values. Details: {e}")
-
-    elif change == 'float':
-        try:
-            df[col_name] = pd.to_numeric(df[col_name], errors='raise').astype(float)
-            st.success("Changed Successfully!")
-        except Exception as e:
-            st.error(f"Conversion to float failed. Check for non-numeric values. Details: {e}")
+    return run_step("reset_index")
+
+def ChangeTypeCol(col_name, to, locale="en-US", date_format="", places=None, errors="raise"):
+    # The new column is built first, so a failed conversion leaves nothing to undo
+    return run_step("change_type", column=col_name, to=to, locale=locale, date_format=date_format,
+                    places=places, errors=errors)
+
+def CheckConversion(col_name, to, locale="en-US", date_format="", places=None):
+    # Dry run: shows which values would fail without changing the data
+    try:
+        result = convert(df[col_name], to, locale, date_format, places)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if result.n_failed:
+        st.warning(f"{result.n_failed:,} values could not be converted to {to}.")
+        st.dataframe(result.failures(df[col_name]), hide_index=True)
+    else:
+        st.success(f"Every value converts to {to}.")
+
+def RunPipeline():
+    # Queued steps run as one optimized pass and become one undo step and one recipe step
+    pipeline = st.session_state.pending
+    try:
+        new_df = pipeline.execute(df, st.session_state.history)
+    except PipelineError as e:
+        replace_df(e.frame)
+        st.error(str(e))
+        return False
+    replace_df(new_df)
+    st.session_state.recipe.add(PIPELINE, steps=pipeline.steps)
+    st.session_state.recipe_redo = []
+    st.session_state.pending = LazyPipeline()
+    return True
+
+def reload_original():
+    # A fresh copy of the loaded file or web table, before any cleaning step
+    if 'uploaded_file' in st.session_state:
+        return init_dataframe(st.session_state["uploaded_file"], st.session_state.get("upload_options"))
+    if 'selected_df' in st.session_state:
+        return st.session_state.selected_df.copy()
+    return None
+
+def ReplayRecipe(recipe):
+    original = reload_original()
+    if original is None:
+        return False
+    history = History()
+    try:
+        result = recipe.replay(original, history)
+    except ValueError as e:
+        st.error(str(e))
+        return False
+    st.session_state.history = history
+    st.session_state.recipe = Recipe(recipe.steps, recipe.name)
+    st.session_state.recipe_redo = []
+    replace_df(result)
+    return True
+
+def RecipeEditor():
+    recipe = st.session_state.recipe
+    st.caption(f"{len(recipe)} recorded steps. Steps are recorded as you clean and can be edited, saved and replayed on a new file.")
+    steps = pd.DataFrame({
+        "op": [step["op"] for step in recipe.steps],
+        "args": [json.dumps(step.get("args", {})) for step in recipe.steps],
+    }, dtype=object)
+    edited = st.data_editor(
+        steps, num_rows="dynamic", width="stretch", key=f"recipe_editor_{id(recipe)}_{len(recipe)}",
+        column_config={
+            "op": st.column_config.SelectboxColumn("Step", options=STEP_OPS, required=True),
+            "args": st.column_config.TextColumn("Arguments (JSON)"),
+        },
+    )
+    edit_col, clear_col = st.columns([1, 1])
+    with edit_col:
+        if st.button("Apply Edits & Replay"):
+            try:
+                edited_steps = [{"op": row.op, "args": json.loads(row.args or "{}")} for row in edited.itertuples()]
+                new_recipe = Recipe.from_dict({"name": recipe.name, "steps": edited_steps})
+            except ValueError as e:
+                st.error(f"Invalid recipe: {e}")
+            else:
+                if ReplayRecipe(new_recipe):
+                    st.success(f"Replayed {len(new_recipe)} steps.")
+    with clear_col:
+        if st.button("Clear Recipe"):
+            recipe.clear()
+            st.session_state.recipe_redo = []
+            st.rerun()
+
+    name = st.text_input("Recipe Name", value=recipe.name)
+    save_col, download_col = st.columns([1, 1])
+    with save_col:
+        if st.button("Save Recipe") and name.strip():
+            recipe.name = name.strip()
+            recipe_store.save(recipe)
+            st.success(f"Saved recipe '{recipe.name}'.")
+    with download_col:
+        st.download_button("Download Recipe", Recipe(recipe.steps, name.strip()).to_json(),
+                           file_name=f"{name.strip() or 'recipe'}.json", mime="application/json")
+
+    saved = recipe_store.names()
+    source = st.radio("Load Recipe From", ["Saved", "File"], horizontal=True)
+    loaded = None
+    if source == "Saved":
+        choice = st.selectbox("Saved Recipes", saved) if saved else None
+        if choice and st.button("Load & Replay"):
+            try:
+                loaded = recipe_store.load(choice)
+            except (OSError, ValueError) as e:
+                st.error(str(e))
+    else:
+        upload = st.file_uploader("Recipe File", type=["json"])
+        if upload is not None and st.button("Load & Replay"):
+            try:
+                loaded = Recipe.from_json(upload.getvalue().decode("utf-8"))
+            except (UnicodeDecodeError, ValueError) as e:
+                st.error(str(e))
+    if loaded is not None and ReplayRecipe(loaded):
+        st.success(f"Replayed {len(loaded)} steps from '{loaded.name or 'recipe'}'.")
 
 # Analysis and statistics
 def mean_df(col):
-    sum = 0
-    n = len(col)
-    for i in col:
-        sum += i
-    mean = sum/n
-    return mean
+    return stats.mean(col)
 
-def ConfidenceInterval(col_name, confidence = 0.95):
+def is_numeric_column(col_name):
+    # Compact dtypes (category, datetime) make pandas reductions raise; report them like Avg does
+    if pd.api.types.is_numeric_dtype(df[col_name]):
+        return True
+    st.error(f"Column '{col_name}' is not numeric.")
+    return False
 
-    data = df[col_name].dropna()
-    
-    mean = data.mean()
-    sem = stats.sem(data)
-    
-    interval = stats.t.interval(confidence, len(data)-1, loc=mean, scale=sem)
-    
+def ConfidenceInterval(col_name, confidence = 0.95):
+    if not is_numeric_column(col_name):
+        return
+    def build():
+        data = df[col_name].dropna()
+        mean, sem, interval = stats.confidence_interval(data, confidence)
+
+        x = np.linspace(mean - 4*sem, mean + 4*sem, 1000)
+        y = scipy_stats.t.pdf(x, len(data)-1, loc=mean, scale=sem)
+
+        fig = go.Figure()
+
+        fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name='t-distribution curve', line=dict(color='blue')))
+
+        fig.add_trace(go.Scatter(
+            x=np.concatenate(([interval[0]], x[(x >= interval[0]) & (x <= interval[1])], [interval[1]])),
+            y=np.concatenate(([0], y[(x >= interval[0]) & (x <= interval[1])], [0])),
+            fill='toself',
+            fillcolor='rgba(144, 238, 144, 0.5)',
+            line=dict(color='rgba(255,255,255,0)'), # no line
+            name='Confidence Interval Range'
+        ))
+
+        # Add a dashed line at the mean
+        fig.add_trace(go.Scatter(
+            x=[mean, mean],
+            y=[0, max(y)],
+            mode='lines',
+            name=f'Mean: {mean:.2f}',
+            line=dict(color='red', dash='dash')
+        ))
+
+        # Add a dashed line at lower bound of CI
+        fig.add_trace(go.Scatter(
+            x=[interval[0], interval[0]],
+            y=[0, max(y)*0.9],
+            mode='lines',
+            name=f'Lower Bound: {interval[0]:.2f}',
+            line=dict(color='green', dash='dash')
+        ))
+
+        # Add a dashed line at upper bound of CI
+        fig.add_trace(go.Scatter(
+            x=[interval[1], interval[1]],
+            y=[0, max(y)*0.9],
+            mode='lines',
+            name=f'Upper Bound: {interval[1]:.2f}',
+            line=dict(color='green', dash='dash')
+        ))
+
+        # Update layout for aesthetics
+        fig.update_layout(
+            title=f'Confidence Interval ({confidence*100}%) and t-Distribution',
+            xaxis_title='Data values',
+            yaxis_title='Probability Density',
+            showlegend=True,
+            width=600,
+            height=400,
+            template='plotly_dark'  # use dark background like your previous plot
+        )
+        return interval, fig
+
+    interval, fig = memo("confidence_interval", build, col_name, confidence)
     st.write(f"Confidence Interval ({confidence*100}%): {interval}")
-    
-    x = np.linspace(mean - 4*sem, mean + 4*sem, 1000)
-    y = stats.t.pdf(x, len(data)-1, loc=mean, scale=sem)
-    
-    fig = go.Figure()
-
-    fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name='t-distribution curve', line=dict(color='blue')))
-
-    fig.add_trace(go.Scatter(
-        x=np.concatenate(([interval[0]], x[(x >= interval[0]) & (x <= interval[1])], [interval[1]])),
-        y=np.concatenate(([0], y[(x >= interval[0]) & (x <= interval[1])], [0])),
-        fill='toself',
-        fillcolor='rgba(144, 238, 144, 0.5)',
-        line=dict(color='rgba(255,255,255,0)'), # no line
-        name='Confidence Interval Range'
-    ))
-
-    # Add a dashed line at the mean
-    fig.add_trace(go.Scatter(
-        x=[mean, mean],
-        y=[0, max(y)],
-        mode='lines',
-        name=f'Mean: {mean:.2f}',
-        line=dict(color='red', dash='dash')
-    ))
-
-    # Add a dashed line at lower bound of CI
-    fig.add_trace(go.Scatter(
-        x=[interval[0], interval[0]],
-        y=[0, max(y)*0.9],
-        mode='lines',
-        name=f'Lower Bound: {interval[0]:.2f}',
-        line=dict(color='green', dash='dash')
-    ))
-
-    # Add a dashed line at upper bound of CI
-    fig.add_trace(go.Scatter(
-        x=[interval[1], interval[1]],
-        y=[0, max(y)*0.9],
-        mode='lines',
-        name=f'Upper Bound: {interval[1]:.2f}',
-        line=dict(color='green', dash='dash')
-    ))
-
-    # Update layout for aesthetics
-    fig.update_layout(
-        title=f'Confidence Interval ({confidence*100}%) and t-Distribution',
-        xaxis_title='Data values',
-        yaxis_title='Probability Density',
-        showlegend=True,
-        width=600,
-        height=400,
-        template='plotly_dark'  # use dark background like your previous plot
-    )
-    
-    # Display the plot
+    st.plotly_chart(fig)
+
+def BootstrapInterval(col_name, confidence=0.95, statistic="mean", q=50, ratio_col=None, method="percentile", replicates=2000):
+    # Resampling interval for skewed data and for statistics the t-interval doesn't cover
+    def build():
+        y = df[ratio_col] if statistic == "ratio" else None
+        result = bootstrap(df[col_name], statistic, y, q, confidence, method, replicates)
+        low, high = result.interval
+        fig = go.Figure()
+        fig.add_trace(go.Histogram(x=result.replicates, nbinsx=60, name='Bootstrap replicates',
+                                   marker=dict(color='rgba(144, 238, 144, 0.6)')))
+        fig.add_vline(x=result.estimate, line=dict(color='red', dash='dash'),
+                      annotation_text=f'Estimate: {result.estimate:.2f}')
+        fig.add_vline(x=low, line=dict(color='green', dash='dash'), annotation_text=f'Lower: {low:.2f}',
+                      annotation_position='top left')
+        fig.add_vline(x=high, line=dict(color='green', dash='dash'), annotation_text=f'Upper: {high:.2f}')
+        fig.update_layout(
+            title=f'Bootstrap Distribution of the {statistic.title()} ({method}, {confidence*100}%)',
+            xaxis_title='Replicate value',
+            yaxis_title='Count',
+            showlegend=False,
+            width=600,
+            height=400,
+            template='plotly_dark'
+        )
+        return result, fig
+
+    try:
+        result, fig = memo("bootstrap", build, col_name, confidence, statistic, q, ratio_col, method, replicates)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    st.write(f"Bootstrap Interval ({confidence*100}%, {method}): {result.interval}")
     st.plotly_chart(fig)
 
 def Covariance(col1, col2):
-    meanCol1 = mean_df(df[col1])
-    meanCol2 = mean_df(df[col2])
-    n = len(df[col1])
-    cov = 0
-    res = 0
-    for i, j in zip(df[col1], df[col2]):
-        res = res + (i-meanCol1)*(j-meanCol2)
-    cov = res/(n-1)
+    # Rows where either value is missing are left out
+    try:
+        cov = memo("covariance", lambda: stats.covariance(df[col1], df[col2]), col1, col2)
+    except ValueError as e:
+        st.error(str(e))
+        return
     st.write(f"Covariance between {col1} and {col2}: {cov:.3f}")
 
-def Correlation(col1, col2):
-    meanCol1 = mean_df(df[col1])
-    meanCol2 = mean_df(df[col2])
-
-    numerator = 0
-    sum_sq_col1 = 0
-    sum_sq_col2 = 0
-
-    for i, j in zip(df[col1], df[col2]):
-        numerator += (i - meanCol1) * (j - meanCol2)
-        sum_sq_col1 += (i - meanCol1) ** 2
-        sum_sq_col2 += (j - meanCol2) ** 2
-
-    denominator = (sum_sq_col1 * sum_sq_col2) ** 0.5
-    correlation = numerator / denominator
-
-    st.write(f"Correlation between {col1} and {col2}: {correlation:.3f}")
-
-    x = df[col1]
-    y = df[col2]
-
-    trace = go.Scatter(
-        x=x,
-        y=y,
-        mode='markers',   
-        name='Data',
-        marker=dict(color='cyan')
-    )
+def Correlation(col1, col2, method="pearson"):
+    def build():
+        correlation = stats.correlation(df[col1], df[col2], method)
+        trace = go.Scatter(
+            x=df[col1],
+            y=df[col2],
+            mode='markers',   
+            name='Data',
+            marker=dict(color='cyan')
+        )
+
+        # Layout
+        layout = go.Layout(
+            title=f'Scatter plot of {col1} vs {col2}',
+            xaxis_title=col1,
+            yaxis_title=col2,
+            template='plotly_dark',
+            width=600,
+            height=400
+        )
+        return correlation, go.Figure(data=[trace], layout=layout)
+
+    try:
+        correlation, fig = memo("correlation", build, col1, col2, method)
+    except ValueError as e:
+        st.error(str(e))
+        return
 
-    # Layout
-    layout = go.Layout(
-        title=f'Scatter plot of {col1} vs {col2}',
-        xaxis_title=col1,
-        yaxis_title=col2,
-        template='plotly_dark',
-        width=600,
-        height=400
-    )
+    st.write(f"{method.title()} correlation between {col1} and {col2}: {correlation:.3f}")
+    st.plotly_chart(fig)
 
-    # Combine and plot
-    fig = go.Figure(data=[trace], layout=layout)
+def CorrelationMatrix(kind, method="pearson"):
+    # Every numeric column against every other in one call
+    def build():
+        matrix = stats.covariance_matrix(df) if kind == "Covariance" else stats.correlation_matrix(df, method)
+        labels = [str(c) for c in matrix.columns]
+        heatmap = go.Heatmap(
+            z=matrix.to_numpy(),
+            x=labels,
+            y=labels,
+            colorscale='RdBu',
+            zmid=0,
+            zmin=-1 if kind == "Correlation" else None,
+            zmax=1 if kind == "Correlation" else None,
+            text=np.round(matrix.to_numpy(), 2),
+            texttemplate='%{text}'
+        )
+        title = f'{method.title()} Correlation' if kind == "Correlation" else 'Covariance'
+        fig = go.Figure(data=[heatmap])
+        fig.update_layout(title=f'{title} Matrix', template='plotly_dark', width=600, height=600)
+        return matrix, fig
+
+    try:
+        matrix, fig = memo("correlation_matrix", build, kind, method)
+    except ValueError as e:
+        st.error(str(e))
+        return
     st.plotly_chart(fig)
+    st.dataframe(matrix)
 
 def StdDev(col_name):
-    std = df[col_name].std()
+    if not is_numeric_column(col_name):
+        return
+    std = memo("std", lambda: df[col_name].std(), col_name)
     st.write(f"Standard Deviation of {col_name}: {std:.3f}")
 
 def Predict(x_col, y_col, input_val):
@@ -289,44 +558,67 @@ def Overview():
     df.info()
 
 def NullVals():
-    st.write(df.isnull().sum())
+    st.write(memo("nulls", lambda: df.isnull().sum()))
 
 def Describe():
     st.write("### Description :")
-    st.write(df.describe())
+    st.write(memo("describe", df.describe))
 
 def Unique(): 
-    st.write(df.nunique())
+    st.write(memo("unique", df.nunique))
 
 def Avg(col_name):
     st.write("### Average:")
-    mean_val = mean_df(df[col_name])
+    try:
+        mean_val = memo("mean", lambda: mean_df(df[col_name]), col_name)
+    except ValueError as e:
+        st.error(str(e))
+        return
     mean_val = np.round(mean_val)
     st.markdown(f"<h5 style='font-size:25px; color:orange;'>{mean_val}</h5>", unsafe_allow_html=True)
 
 def Sum(col_name):
     st.write("### Sum:")
-    sum_val = df[col_name].sum()
+    if not is_numeric_column(col_name):
+        return
+    sum_val = memo("sum", lambda: df[col_name].sum(), col_name)
     st.markdown(f"<h5 style='font-size:25px; color:orange;'>{sum_val}</h5>", unsafe_allow_html=True)
 
 def Sorting(col_name , B):
-    save_state()
-    if B == '0':
-       df.sort_values(by = col_name , ascending = True , inplace=True)
-       st.write(df)
-    elif B == '1':
-       df.sort_values(by=col_name , ascending = False , inplace=True)
-       st.write(df)
-    else:
+    if B not in ('0', '1'):
         st.warning("Enter Appropriate Column")
+        return
+    # Sorting is undone by applying the inverse row permutation
+    if run_step("sort", column=col_name, ascending=B == '0'):
+        show_frame(df, "sorted")
+
+def TopK(col_name, N, largest=True, by=(), tie_cols=(), tie_ascending=True):
+    # Partial selection instead of a full sort; per group when grouping columns are chosen
+    tie_breakers = [(c, tie_ascending) for c in tie_cols]
+    try:
+        rows = memo("top_k", lambda: top_k(df, col_name, N, largest, tie_breakers, by),
+                    col_name, N, largest, by, tie_breakers)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    st.write(rows)
 
-def TopN(col_name, N):
-    top = df.sort_values(by = col_name , ascending = True).head(int(N))
-    st.write(top)
+def TopN(col_name, N, by=(), tie_cols=(), tie_ascending=True):
+    TopK(col_name, N, True, by, tie_cols, tie_ascending)
 
-def BottomN(col_name, N):
-    bottom = df.sort_values(by = col_name , ascending = True).tail(int(N))
-    st.write(bottom)
+def BottomN(col_name, N, by=(), tie_cols=(), tie_ascending=True):
+    TopK(col_name, N, False, by, tie_cols, tie_ascending)
+
+def TopKOptions(col_name):
+    others = [c for c in df.columns if c != col_name]
+    group_col, tie_col, order_col = st.columns([2, 2, 1])
+    with group_col:
+        by = st.multiselect("Per Group Of", others)
+    with tie_col:
+        tie_cols = st.multiselect("Break Ties By", [c for c in others if c not in by])
+    with order_col:
+        tie_order = st.radio("Tie Order", ["Ascending", "Descending"])
+    return by, tie_cols, tie_order == "Ascending"
 
 # Display data cleaning options
 if df is not None:
@@ -335,10 +627,13 @@ if df is not None:
         with left_col:
             st.write("### Data Cleaning")
         with mid_col:
-            st_lottie(anim, height=60, key="cleaning")
+            if anim:
+                st_lottie(anim, height=60, key="cleaning")
 
     with st.container(key="Cleaning_Options"):
-        option = st.selectbox("Cleaning Options", ["Drop Columns", "Strip", "Replace", "dropNa", "Fill Null Vals", "Set Index", "Reset Index", "Drop Duplicates", "Drop Row", "Change Type"])
+        st.toggle("Lazy mode", key="lazy_mode",
+                  help="Queue steps instead of applying them, then run them together as one optimized pass")
+        option = st.selectbox("Cleaning Options", ["Drop Columns", "Strip", "Replace", "Bulk Replace", "dropNa", "Fill Null Vals", "Set Index", "Reset Index", "Drop Duplicates", "Drop Row", "Change Type"])
 
         if option == "dropNa":
             if st.button("Drop"):
@@ -354,61 +649,173 @@ if df is not None:
             col_name = st.selectbox("Select Column to Strip", df.columns)
             expr = st.text_input("Enter Expression to Strip")
             if st.button("Strip"):
-                trim(side, col_name, expr)
-                st.success("Trimmed Successfully!")
+                if trim(side, col_name, expr):
+                    st.success("Trimmed Successfully!")
 
         elif option == 'Replace':
             col_name = st.selectbox("Select Column ", df.columns)
             expr1 = st.text_input("Enter Old Expression")
             expr2 = st.text_input("Enter New Expression")
             if st.button('Replace'):
-                Replace(expr1, expr2, col_name)
-                st.success("Replaced Successfully!")
+                if Replace(expr1, expr2, col_name):
+                    st.success("Replaced Successfully!")
+
+        elif option == 'Bulk Replace':
+            st.caption("One rule per row, applied in order. Leave Columns empty to use every text column.")
+            rules_df = st.data_editor(
+                pd.DataFrame({"pattern": [""], "replacement": [""], "columns": [""],
+                              "ignore_case": [False], "literal": [False]}, dtype=object),
+                num_rows="dynamic", key="bulk_rules", hide_index=True,
+                column_config={
+                    "pattern": st.column_config.TextColumn("Pattern (regex)"),
+                    "replacement": st.column_config.TextColumn("Replacement"),
+                    "columns": st.column_config.TextColumn("Columns (comma separated)"),
+                    "ignore_case": st.column_config.CheckboxColumn("Ignore Case"),
+                    "literal": st.column_config.CheckboxColumn("Literal Text"),
+                },
+            )
+            rules = rules_from_editor(rules_df)
+            preview_col, apply_col = st.columns([1, 1])
+            with preview_col:
+                if st.button("Preview Matches"):
+                    if rules:
+                        PreviewBulkReplace(rules)
+                    else:
+                        st.warning("Add at least one rule with a pattern.")
+            with apply_col:
+                if st.button("Replace All"):
+                    if not rules:
+                        st.warning("Add at least one rule with a pattern.")
+                    elif BulkReplace(rules):
+                        st.success("Replaced Successfully!")
 
         elif option == 'Set Index':
             col_name = st.selectbox("Select Column ", df.columns)
             if st.button('SetIndex'):
-                SetIndex(col_name)
-                st.success("Set Successfully!")
+                if SetIndex(col_name):
+                    st.success("Set Successfully!")
 
         elif option == 'Reset Index':
             if st.button('ResetIndex'):
-                ResetIndex()
-                st.success("Reset Successfully!")
+                if ResetIndex():
+                    st.success("Reset Successfully!")
 
         elif option == 'Drop Duplicates':
-            if st.button('Drop', key="Duplicates"):
-                DropDuplicates()
-                st.success("Dropped Successfully!")
+            mode = st.radio("Match", ["Exact", "Near (text)"], horizontal=True)
+            if mode == "Exact":
+                subset = st.multiselect("Key Columns (empty = all columns)", list(df.columns))
+                keep = st.selectbox("Keep", list(KEEP), help="Which row of each group is kept; none removes every copy")
+                find_col, drop_col = st.columns([1, 1])
+                with find_col:
+                    if st.button("Find Duplicates"):
+                        try:
+                            ShowDuplicateGroups(*duplicate_groups(df, subset), "duplicate rows")
+                        except ValueError as e:
+                            st.error(str(e))
+                with drop_col:
+                    if st.button('Drop', key="Duplicates"):
+                        removed = DropDuplicates(subset, keep)
+                        if removed is not None:
+                            st.success(f"Dropped {removed:,} duplicate rows.")
+            else:
+                text_columns = [c for c in df.columns if is_text_column(df[c])]
+                columns = st.multiselect("Text Columns", text_columns, default=text_columns[:1])
+                threshold = st.slider("Similarity", 0.70, 1.00, 0.90, 0.01)
+                blocking = st.selectbox("Blocking", BLOCKING,
+                                        help="prefix compares values sharing their first characters; "
+                                             "tokens also ignores word order")
+                find_col, drop_col = st.columns([1, 1])
+                with find_col:
+                    if st.button("Find Near Duplicates"):
+                        try:
+                            clusters = near_duplicate_clusters(df, columns, threshold, blocking)
+                            ShowDuplicateGroups(*near_duplicate_groups(df, columns, clusters), "near duplicates")
+                        except ValueError as e:
+                            st.error(str(e))
+                with drop_col:
+                    if st.button('Drop', key="NearDuplicates"):
+                        removed = DropNearDuplicates(columns, threshold, blocking)
+                        if removed is not None:
+                            st.success(f"Dropped {removed:,} near-duplicate rows.")
 
         elif option == 'Fill Null Vals':
             val = st.text_input("Enter Value")
             if st.button('Fill'):
-                Fillna(val)
-                st.success("Filled Successfully!")
+                if Fillna(val):
+                    st.success("Filled Successfully!")
 
         elif option == 'Drop Row':
-            val = st.text_input("Enter the Value")
             col_name = st.selectbox("Select Column ", df.columns)
+            operator = st.selectbox("Drop Rows Where Value", OPERATORS)
+            val, upper = "", ""
+            if operator == "between":
+                low_col, high_col = st.columns([1, 1])
+                with low_col:
+                    val = st.text_input("From")
+                with high_col:
+                    upper = st.text_input("To")
+            elif operator == "in list":
+                val = st.text_input("Enter Values (comma separated)")
+            elif operator not in NO_VALUE:
+                val = st.text_input("Enter the Value")
             if st.button('Drop'):
-                DropRowIf(col_name, val)
-                st.success("Dropped Successfully!")
+                removed = DropRowIf(col_name, operator, val, upper)
+                if removed is not None:
+                    st.success(f"Dropped {removed:,} rows.")
 
         elif option == 'Change Type':
             col_name = st.selectbox("Select Column ", df.columns)
-            type = st.text_input("Enter the Value")
-            if st.button('Type'):
-                ChangeTypeCol(col_name, type)
-                st.success("Changed Successfully!")
-
-        # Undo option
-        if st.button("Undo"):
-            undo_last_action()
+            to = st.selectbox("Convert To", TYPES)
+            locale = st.selectbox("Number And Date Format", list(LOCALES))
+            date_format, places = "", None
+            if to == "datetime":
+                date_format = st.text_input("Date Format (optional, e.g. %d/%m/%Y)")
+            elif to == "decimal":
+                places = st.number_input("Decimal Places", min_value=0, max_value=28, value=2)
+            on_failure = st.radio("If Some Values Fail", ["Cancel the conversion", "Set them to missing"], horizontal=True)
+            errors = "raise" if on_failure == "Cancel the conversion" else "coerce"
+            check_col, type_col = st.columns([1, 1])
+            with check_col:
+                if st.button('Check Conversion'):
+                    CheckConversion(col_name, to, locale, date_format, places)
+            with type_col:
+                if st.button('Type'):
+                    if ChangeTypeCol(col_name, to, locale, date_format, places, errors):
+                        st.success("Changed Successfully!")
+
+        pending = st.session_state.pending
+        if len(pending):
+            st.write(f"#### Pending Pipeline ({len(pending)} steps)")
+            st.code(pending.explain(), language=None)
+            run_col, discard_col = st.columns([1, 1])
+            with run_col:
+                if st.button("Run Pipeline") and RunPipeline():
+                    st.success("Pipeline applied.")
+            with discard_col:
+                if st.button("Discard Pending Steps"):
+                    st.session_state.pending = LazyPipeline()
+                    st.rerun()
+
+        # Undo / redo options
+        undo_col, redo_col = st.columns([1, 1])
+        with undo_col:
+            if st.button("Undo"):
+                undo_last_action()
+        with redo_col:
+            if st.button("Redo"):
+                redo_last_action()
+        history = st.session_state.history
+        st.caption(f"History: {len(history)} undo steps, {history.memory_bytes / 1024**2:.1f} MB in memory, "
+                   f"{history.spilled_bytes / 1024**2:.1f} MB spilled to disk"
+                   + (f", {history.collapsed} oldest steps discarded" if history.collapsed else ""))
+
+        with st.expander("Cleaning Recipe"):
+            RecipeEditor()
 
         # Display the updated DataFrame after cleaning operations
         st.write("### Updated Data")
         updated_data = st.session_state.df
-        st.write(st.session_state.df)  # Display the DataFrame from session state after possible undo
+        show_frame(updated_data, "updated")  # The frame from session state after possible undo
 
         # Save updated DataFrame back to session state
         st.session_state.df = df
@@ -416,18 +823,19 @@ if df is not None:
 # ---------------------Analysis------------------------#
 if df is not None:
     st.write("#")
-    anim2 = load_lottie_url("https://lottie.host/e7b626ff-351f-40f0-9f31-8f22bbefe1b0/jbBiungPOi.json")
+    anim2 = load_lottie("analyse")
 
     with st.container(key="Head_Analysis"):
         left, mid, right, more, more4 = st.columns([1, 0.8, 0.1, 1, 1])
         with left:
             st.write("## Summarize")
         with mid:
-            st.lottie(anim2, height=100, key="analyse")
+            if anim2:
+                st_lottie(anim2, height=100, key="analyse")
 
     with st.container(key="Main_Analysis"): 
          st.write("### Final DataFrame")
-         st.write(updated_data) 
+         show_frame(updated_data, "final")
          st.write("#")
          option = st.selectbox("Select Operation", ["None", "Sum", "Average", "Sorting", "TopN", "BottomN", "Overview", "Null Vals", "Describe", "Unique"])
 
@@ -442,17 +850,18 @@ if df is not None:
          if option == 'Sorting':
             col_name = st.selectbox("Column Name", df.columns)
             bool = st.text_input("Ascending (Type 0) or Descending (Type 1)")
-            Sorting(col_name, bool)
+            if st.button("Sort"):
+                Sorting(col_name, bool)
 
          if option == 'TopN':
             col_name = st.selectbox("Column Name", df.columns)
-            nums = st.text_input("Enter Number of Rows")
-            TopN(col_name, nums)
+            nums = st.number_input("Enter Number of Rows", min_value=1, value=5)
+            TopN(col_name, nums, *TopKOptions(col_name))
 
          if option == 'BottomN':
             col_name = st.selectbox("Column Name", df.columns)
-            nums = st.text_input("Enter Number of Rows")
-            BottomN(col_name, nums)
+            nums = st.number_input("Enter Number of Rows", min_value=1, value=5)
+            BottomN(col_name, nums, *TopKOptions(col_name))
 
          if option == 'Overview':
             Overview()
@@ -469,7 +878,7 @@ if df is not None:
     with st.container(key="Advanced_Analysis"):
          st.write("#")
          st.write("### Advanced Analysis")
-         option = st.selectbox("Select Operation", ["None","Standard Deviation","Confidence Interval","Covariance","Correlation"])
+         option = st.selectbox("Select Operation", ["None","Standard Deviation","Confidence Interval","Covariance","Correlation","Correlation Matrix"])
          if option == "Standard Deviation":
             col_name = st.selectbox("Column Name", df.columns)
             StdDev(col_name)
@@ -477,7 +886,24 @@ if df is not None:
          if option == "Confidence Interval":
             col_name = st.selectbox("Column Name", df.columns)
             confidence = st.slider("Confidence Level", 0.80, 0.99, 0.95)
-            ConfidenceInterval(col_name, confidence)
+            kind = st.radio("Interval", ["t-Distribution", "Bootstrap"], horizontal=True)
+            if kind == "Bootstrap":
+               stat_col, method_col, reps_col = st.columns([1, 1, 1])
+               with stat_col:
+                 statistic = st.selectbox("Statistic", BOOTSTRAP_STATISTICS)
+               with method_col:
+                 method = st.selectbox("Interval Method", BOOTSTRAP_METHODS)
+               with reps_col:
+                 replicates = st.number_input("Replicates", min_value=100, max_value=100_000, value=2000, step=500)
+               q = st.slider("Percentile", 1, 99, 90) if statistic == "percentile" else 50
+               ratio_col = st.selectbox("Divide By Column", df.columns) if statistic == "ratio" else None
+               left, right = st.columns([1, 1])
+               with left:
+                 ConfidenceInterval(col_name, confidence)
+               with right:
+                 BootstrapInterval(col_name, confidence, statistic, q, ratio_col, method, replicates)
+            else:
+               ConfidenceInterval(col_name, confidence)
          
          if option == "Covariance":
             left, right = st.columns([1, 1])
@@ -493,4 +919,10 @@ if df is not None:
               col_name1 = st.selectbox("First Column Name",df.columns)
             with right:
               col1_name2 = st.selectbox("Second Column Name",df.columns) 
-            Correlation(col_name1,col1_name2) 
+            method = st.selectbox("Method", stats.METHODS)
+            Correlation(col_name1,col1_name2,method)
+
+         if option == "Correlation Matrix":
+            kind = st.radio("Matrix", ["Correlation", "Covariance"], horizontal=True)
+            method = st.selectbox("Method", stats.METHODS) if kind == "Correlation" else "pearson"
+            CorrelationMatrix(kind, method) 
@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import math  
+from utils.column_store import column_store
+from utils.dataset_version import dataset_identity
+from utils.sampling import METHODS, SampleCache
 
 # Styling
 st.set_page_config(page_title="Dynamic Dashboard", layout="wide")
@@ -40,6 +43,21 @@ def piechart(df, column):
     fig.update_layout(title="Pie Chart", template='plotly_dark', width=400, height=400)
     return fig
 
+# Rows used by the charts: a leading slice, a cached sample, or the whole frame
+def chart_frame(columns, limit):
+    if sampling == "Exact (all rows)":
+        return df
+    if sampling in METHODS:
+        positions = st.session_state.sample_cache.positions(dataset_identity(st.session_state), df, sampling, limit, strata)
+        return df.iloc[positions]
+    # Unedited uploads are read back from the columnar store, touching only the charted columns.
+    # Every cleaning step and undo bumps the version, whereas the undo history can be trimmed to nothing
+    key = st.session_state.get("df_key")
+    unedited = st.session_state.get("df_version", 0) == 0
+    if 'uploaded_file' in st.session_state and key is not None and unedited and column_store.has(key):
+        return column_store.load(key, columns, limit=limit)
+    return df.head(limit)
+
 # Load dataframe from session state
 if 'df' in st.session_state:
     df = st.session_state.df
@@ -47,6 +65,8 @@ if 'df' in st.session_state:
     # Initialize charts list
     if 'charts' not in st.session_state:
         st.session_state.charts = []
+    if 'sample_cache' not in st.session_state:
+        st.session_state.sample_cache = SampleCache()
 
     st.title("Build Your Interactive Dashboard")
 
@@ -82,10 +102,15 @@ if 'df' in st.session_state:
             st.session_state.charts.append(('Pie', pie_col))
 
         bins = num_rows()
+        sampling = st.selectbox("Rows Used in Charts", ["First N rows"] + METHODS + ["Exact (all rows)"], key="sampling")
+        strata = st.selectbox("Stratify By", df.columns, key="strata") if sampling == "Stratified" else None
 
         st.divider()
 
         st.subheader("Your Dashboard")
+        if sampling in METHODS and bins < len(df):
+            shown = len(chart_frame([], bins))
+            st.caption(f"Sampled {shown:,} of {len(df):,} rows ({sampling.lower()})")
 
         num_charts = len(st.session_state.charts)
         if num_charts > 0:
@@ -100,16 +125,16 @@ if 'df' in st.session_state:
                         chart_type, *params = st.session_state.charts[index]
                         with chart_cols[c]:
                             if chart_type == 'Bar':
-                                fig = barchart(df.head(bins), params[0], params[1])
+                                fig = barchart(chart_frame(params[:2], bins), params[0], params[1])
                                 st.plotly_chart(fig, use_container_width=True)
                             elif chart_type == 'Area':
-                                fig = areachart(df.head(bins), params[0], params[1])
+                                fig = areachart(chart_frame(params[:2], bins), params[0], params[1])
                                 st.plotly_chart(fig, use_container_width=True)
                             elif chart_type == 'Scatter':
-                                fig = scatterplot(df.head(bins), params[0], params[1])
+                                fig = scatterplot(chart_frame(params[:2], bins), params[0], params[1])
                                 st.plotly_chart(fig, use_container_width=True)
                             elif chart_type == 'Pie':
-                                fig = piechart(df.head(bins), params[0])
+                                fig = piechart(chart_frame(params[:1], bins), params[0])
                                 st.plotly_chart(fig, use_container_width=True)
                             if st.button(f"Remove {index + 1}", key=f"remove_{index}"):
                                 st.session_state.charts.pop(index)
@@ -126,16 +151,16 @@ if 'df' in st.session_state:
                 f.write("<html><head><title>Streamlit Dashboard</title></head><body>")
                 for chart_type, *params in st.session_state.charts:
                     if chart_type == 'Bar':
-                        fig = barchart(df.head(bins), params[0], params[1])
+                        fig = barchart(chart_frame(params[:2], bins), params[0], params[1])
                         f.write(fig.to_html(full_html=False, include_plotlyjs='cdn'))
                     elif chart_type == 'Area':
-                        fig = areachart(df.head(bins), params[0], params[1])
+                        fig = areachart(chart_frame(params[:2], bins), params[0], params[1])
                         f.write(fig.to_html(full_html=False, include_plotlyjs='cdn'))
                     elif chart_type == 'Scatter':
-                        fig = scatterplot(df.head(bins), params[0], params[1])
+                        fig = scatterplot(chart_frame(params[:2], bins), params[0], params[1])
                         f.write(fig.to_html(full_html=False, include_plotlyjs='cdn'))
                     elif chart_type == 'Pie':
-                        fig = piechart(df.head(bins), params[0])
+                        fig = piechart(chart_frame(params[:1], bins), params[0])
                         f.write(fig.to_html(full_html=False, include_plotlyjs='cdn'))
                 f.write("</body></html>")
             st.success("Dashboard saved as HTML!")
@@ -2,8 +2,8 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as plt
-import requests
 from streamlit_lottie import st_lottie
+from utils.assets import load_lottie
 from datetime import datetime
 
 # Set the page configuration
@@ -226,14 +226,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def load_lottie_url(url):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
-
 # Load animations
-analyzing_animation = load_lottie_url("https://lottie.host/46d346ba-c57b-452c-ac6f-2b4a34d4d87d/YUWkpeSAFk.json")
+analyzing_animation = load_lottie("analyzing")
 
 # Hero Section
 st.markdown('<h1 class="hero-title">Welcome to YourAnalyst</h1>', unsafe_allow_html=True)
@@ -243,7 +237,8 @@ st.markdown('<p class="hero-subtitle">Transform Your Data into Actionable Insigh
 col1, col2 = st.columns([1, 1])
 
 with col1:
-    st_lottie(analyzing_animation, height=300, key="analyzing")
+    if analyzing_animation:
+        st_lottie(analyzing_animation, height=300, key="analyzing")
 
 with col2:
     st.markdown("""
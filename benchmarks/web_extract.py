@@ -0,0 +1,55 @@
+# Compares the table extraction engines on a directory of saved HTML pages.
+# Run from the repository root:  python -m benchmarks.web_extract path/to/pages [repeats]
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from utils.table_parser import ENGINES, extract_tables
+
+
+def _run(engine, paths, repeats, queue):
+    # Each engine runs in a fresh process so its peak RSS isn't inflated by the others
+    pages = [path.read_bytes() for path in paths]
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tables = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for content in pages:
+            tables = len(extract_tables(content, engine))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    queue.put((engine, elapsed / repeats, peak / 1024, tables))
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python -m benchmarks.web_extract PAGES_DIR [REPEATS]")
+        sys.exit(1)
+    paths = sorted(Path(sys.argv[1]).glob("*.htm*"))
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    if not paths:
+        print(f"No .html files found in {sys.argv[1]}")
+        sys.exit(1)
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for engine in ENGINES:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run, args=(engine, paths, repeats, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+
+    report = pd.DataFrame(results, columns=["engine", "seconds_per_pass", "peak_rss_mb", "tables_last_page"])
+    baseline = report.loc[report["engine"] == "legacy", "seconds_per_pass"].iloc[0]
+    report["speedup_vs_legacy"] = baseline / report["seconds_per_pass"]
+    print(f"{len(paths)} pages, {repeats} passes")
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sys
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def _freeze(value):
+    # Widget values as a hashable key; lists and dicts become tuples
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _size(value):
+    # Rough bytes held by a cached result; figures are counted by the arrays in their traces
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sum(_size(v) for v in value)
+    if hasattr(value, "data") and hasattr(value, "to_plotly_json"):
+        return sum(_size(v) for trace in value.data for v in trace.to_plotly_json().values())
+    return sys.getsizeof(value)
+
+
+class AnalysisCache:
+    # Results of analysis operations (tables, numbers, figures) for one version of the dataset.
+    # Any cleaning step changes the identity, which drops everything; otherwise the least
+    # recently used results go first once either limit is passed
+    def __init__(self, max_entries=64, max_bytes=256 * 1024**2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.identity = None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _check(self, identity):
+        if identity != self.identity:
+            self.identity = identity
+            self._entries.clear()
+            self._bytes = 0
+
+    def get(self, identity, op, args, compute):
+        self._check(identity)
+        key = (op, _freeze(args))
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+        self.misses += 1
+        value = compute()
+        size = _size(value)
+        self._entries[key] = (value, size)
+        self._bytes += size
+        # The newest result is always kept, even when it is bigger than the limit on its own
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+        return value
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
@@ -0,0 +1,70 @@
+import bz2
+import gzip
+import lzma
+import zipfile
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIONS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.zst': 'zstd',
+    '.zip': 'zip',
+}
+TABLE_SUFFIXES = ('.csv', '.tsv', '.txt')
+
+
+def compression_of(name):
+    for suffix, compression in COMPRESSIONS.items():
+        if name.lower().endswith(suffix):
+            return compression
+    return None
+
+
+def inner_name(name):
+    # "export.csv.gz" -> "export.csv"
+    compression = compression_of(name)
+    if compression is None or compression == 'zip':
+        return name
+    return name[:name.lower().rindex('.')]
+
+
+def _table_members(zf):
+    return [info.filename for info in zf.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(TABLE_SUFFIXES)
+            and not info.filename.startswith('__MACOSX/')]
+
+
+def list_members(file):
+    file.seek(0)
+    with zipfile.ZipFile(file) as zf:
+        return _table_members(zf)
+
+
+def open_stream(file, member=None):
+    # Returns a file-like object that decompresses lazily as the parser reads from it
+    file.seek(0)
+    compression = compression_of(file.name)
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=file, mode='rb')
+    if compression == 'bz2':
+        return bz2.BZ2File(file, mode='rb')
+    if compression == 'xz':
+        return lzma.LZMAFile(file, mode='rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError("Reading .zst files requires the zstandard package.")
+        return zstandard.ZstdDecompressor().stream_reader(file, read_across_frames=True)
+    if compression == 'zip':
+        zf = zipfile.ZipFile(file)
+        members = _table_members(zf)
+        if member is None:
+            if not members:
+                raise ValueError("The archive contains no CSV, TSV or TXT files.")
+            member = members[0]
+        return zf.open(member)
+    return file
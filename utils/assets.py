@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+import requests
+
+LOTTIE_DIR = Path(__file__).resolve().parent.parent / "assets" / "lottie"
+DOWNLOAD_TIMEOUT = 10
+
+# Animations are served from the bundled files and kept in memory for the life of the process
+_cache = {}
+_refreshing = set()
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _manifest():
+    with open(LOTTIE_DIR / "manifest.json", 'r') as f:
+        return json.load(f)
+
+
+def _fetch(name):
+    r = requests.get(_manifest()[name], timeout=DOWNLOAD_TIMEOUT)
+    if r.status_code != 200:
+        return None
+    return r.json()
+
+
+def _download(name):
+    # Only the bundling command below writes into the source tree; the app never does
+    data = _fetch(name)
+    if data is None:
+        return None
+    path = LOTTIE_DIR / f"{name}.json"
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+    return data
+
+
+def _refresh(name):
+    try:
+        data = _fetch(name)
+    except (requests.RequestException, ValueError, OSError):
+        data = None
+    with _lock:
+        if data is not None:
+            _cache[name] = data
+        _refreshing.discard(name)
+
+
+def _refresh_in_background(name):
+    with _lock:
+        if name in _refreshing:
+            return
+        _refreshing.add(name)
+    threading.Thread(target=_refresh, args=(name,), daemon=True).start()
+
+
+def load_lottie(name):
+    # Never touches the network on the render path; a missing bundle file is fetched in the
+    # background into memory only and shows up on a later rerun, until then no animation is shown.
+    # Set LOTTIE_REFRESH=1 to prefer the manifest URLs over the bundled files.
+    with _lock:
+        if name in _cache:
+            return _cache[name]
+    path = LOTTIE_DIR / f"{name}.json"
+    data = None
+    if path.exists():
+        with open(path, 'r') as f:
+            data = json.load(f)
+        with _lock:
+            _cache[name] = data
+    if data is None or os.getenv('LOTTIE_REFRESH') == '1':
+        _refresh_in_background(name)
+    return data
+
+
+if __name__ == "__main__":
+    # python -m utils.assets  -> (re)download every animation listed in the manifest
+    failed = []
+    for name in _manifest():
+        try:
+            if _download(name) is None:
+                failed.append(name)
+        except (requests.RequestException, ValueError, OSError):
+            failed.append(name)
+    if failed:
+        print(f"Failed to download: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"Saved {len(_manifest())} animations to {LOTTIE_DIR}")
@@ -0,0 +1,168 @@
+# Applies a cleaning recipe and the summary statistics to every data file in a directory, without a browser.
+# Run from the repository root:
+#   python -m utils.batch_runner INPUT_DIR OUTPUT_DIR [--recipe recipe.json] [--workers N]
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from utils.archive_reader import compression_of, inner_name
+from utils.dtype_optimizer import optimize_dtypes
+from utils.excel_reader import list_sheets
+from utils.ingest import parse_file
+from utils.recipe import Recipe
+from utils.stats import summary
+
+SUFFIXES = (".csv", ".xlsx", ".txt", ".tsv")
+FORMATS = ("csv", "parquet")
+
+
+def _is_table(path):
+    return compression_of(path.name) == 'zip' or inner_name(path.name).lower().endswith(SUFFIXES)
+
+
+def find_jobs(input_dir, pattern="*", all_sheets=False):
+    # One job per file, or per visible sheet of a workbook; biggest files first so the pool stays busy
+    paths = sorted((p for p in Path(input_dir).glob(pattern) if p.is_file() and _is_table(p)),
+                   key=lambda p: p.stat().st_size, reverse=True)
+    jobs = []
+    for path in paths:
+        if all_sheets and path.name.lower().endswith(".xlsx"):
+            try:
+                sheets = [s["name"] for s in list_sheets(path) if not s["hidden"]]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Skipping {path.name}: {e}", file=sys.stderr)
+                continue
+            jobs.extend((path, sheet) for sheet in sheets)
+        else:
+            jobs.append((path, None))
+    return [(path, sheet, stem) for (path, sheet), stem in zip(jobs, _output_stems(jobs))]
+
+
+def _output_stems(jobs):
+    # "sales.csv.gz" -> "sales"; inputs that would share a name keep their extension too
+    stems = [Path(inner_name(path.name)).stem + (f"__{sheet}" if sheet else "") for path, sheet in jobs]
+    return [stem if stems.count(stem) == 1 else path.name.replace(".", "_") + (f"__{sheet}" if sheet else "")
+            for stem, (path, sheet) in zip(stems, jobs)]
+
+
+def _write(df, path, fmt):
+    # Only an index set by the recipe is data worth keeping; a shuffled row number is not
+    keep_index = any(name is not None for name in df.index.names)
+    if fmt == "parquet":
+        df.to_parquet(path, index=keep_index)
+    else:
+        df.to_csv(path, index=keep_index)
+
+
+def process_file(path, sheet, stem, steps, output_dir, fmt="csv", with_stats=True):
+    # Runs in a worker process; failures are reported in the summary instead of stopping the batch
+    start = time.perf_counter()
+    result = {"file": path.name, "sheet": sheet, "status": "ok", "error": "",
+              "rows_in": 0, "rows_out": 0, "columns_in": 0, "columns_out": 0, "output": ""}
+    try:
+        with open(path, 'rb') as f:
+            df = parse_file(f, {"sheet": sheet} if sheet else None)
+        optimize_dtypes(df)
+        result["rows_in"], result["columns_in"] = df.shape
+        df = Recipe(steps).replay(df)
+        result["rows_out"], result["columns_out"] = df.shape
+        out = Path(output_dir) / f"{stem}.{fmt}"
+        _write(df, out, fmt)
+        result["output"] = out.name
+        if with_stats:
+            summary(df).to_csv(Path(output_dir) / f"{stem}.stats.csv", index=False)
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_batch(input_dir, output_dir, recipe=None, workers=None, pattern="*", fmt="csv",
+              all_sheets=False, with_stats=True, on_result=None):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    steps = recipe.steps if recipe is not None else []
+    jobs = find_jobs(input_dir, pattern, all_sheets)
+    workers = workers or os.cpu_count() or 1
+
+    results = []
+    start = time.perf_counter()
+    if workers == 1:
+        for path, sheet, stem in jobs:
+            results.append(process_file(path, sheet, stem, steps, output_dir, fmt, with_stats))
+            if on_result is not None:
+                on_result(results[-1], len(results), len(jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, max(len(jobs), 1))) as pool:
+            futures = [pool.submit(process_file, path, sheet, stem, steps, output_dir, fmt, with_stats)
+                       for path, sheet, stem in jobs]
+            for future in as_completed(futures):
+                results.append(future.result())
+                if on_result is not None:
+                    on_result(results[-1], len(results), len(jobs))
+    elapsed = time.perf_counter() - start
+
+    report = pd.DataFrame(results, columns=["file", "sheet", "status", "error", "rows_in", "rows_out",
+                                            "columns_in", "columns_out", "seconds", "output"])
+    report = report.sort_values(["file", "sheet"], na_position="first").reset_index(drop=True)
+    report.to_csv(output_dir / "summary.csv", index=False)
+    totals = {
+        "files": len(report),
+        "failed": int((report["status"] != "ok").sum()),
+        "rows_in": int(report["rows_in"].sum()),
+        "rows_out": int(report["rows_out"].sum()),
+        "workers": workers,
+        "wall_seconds": round(elapsed, 3),
+        "recipe": recipe.to_dict() if recipe is not None else None,
+    }
+    with open(output_dir / "summary.json", 'w') as f:
+        json.dump(totals, f, indent=4)
+    return report, totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.batch_runner",
+                                     description="Apply a cleaning recipe to every data file in a directory.")
+    parser.add_argument("input_dir", help="directory with CSV/XLSX/TXT/TSV files (optionally compressed)")
+    parser.add_argument("output_dir", help="where cleaned files, per-file stats and summary.csv are written")
+    parser.add_argument("--recipe", help="cleaning recipe JSON saved from the Analyse page")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--pattern", default="*", help="glob for input files (default: *)")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="output format for cleaned data")
+    parser.add_argument("--all-sheets", action="store_true", help="process every visible sheet of each workbook")
+    parser.add_argument("--no-stats", action="store_true", help="skip the per-file summary statistics")
+    args = parser.parse_args(argv)
+
+    recipe = None
+    if args.recipe:
+        try:
+            with open(args.recipe, 'r') as f:
+                recipe = Recipe.from_json(f.read())
+        except (OSError, ValueError) as e:
+            print(f"Could not read recipe: {e}", file=sys.stderr)
+            return 2
+
+    def progress(result, done, total):
+        note = f" ({result['error']})" if result["status"] != "ok" else ""
+        name = result["file"] + (f" [{result['sheet']}]" if result["sheet"] else "")
+        print(f"[{done}/{total}] {name}: {result['status']} in {result['seconds']}s{note}")
+
+    report, totals = run_batch(args.input_dir, args.output_dir, recipe, args.workers, args.pattern,
+                               args.format, args.all_sheets, not args.no_stats, on_result=progress)
+    if report.empty:
+        print(f"No data files found in {args.input_dir}")
+        return 1
+    print(f"{totals['files']} files, {totals['failed']} failed, {totals['rows_in']:,} -> {totals['rows_out']:,} rows "
+          f"in {totals['wall_seconds']}s with {totals['workers']} workers. Report: {Path(args.output_dir) / 'summary.csv'}")
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+from scipy import stats
+
+STATISTICS = ["mean", "median", "percentile", "ratio"]
+METHODS = ["percentile", "bca"]
+# Most index cells (replicates x rows) drawn at once; bounds memory whatever the size of the data
+MAX_CELLS = 4_000_000
+# Fewest replicates per block worth batching; with fewer, each replicate is drawn as row counts instead
+MIN_BLOCK = 8
+PARALLEL_MIN_CELLS = 20_000_000
+# Replicates per seeded block; fixed so the result is the same for any number of workers
+BLOCK_REPLICATES = 250
+
+
+@dataclass
+class BootstrapResult:
+    statistic: str
+    estimate: float
+    interval: tuple
+    replicates: np.ndarray
+    method: str
+    confidence: float
+
+
+def _floats(values):
+    values = pd.Series(values)
+    if not ptypes.is_numeric_dtype(values) or ptypes.is_bool_dtype(values):
+        raise ValueError(f"Column '{values.name}' is not numeric." if values.name is not None else "Values are not numeric.")
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _clean(x, y=None):
+    # float arrays without missing values; a ratio keeps only rows where both are present
+    x = _floats(x)
+    if y is None:
+        return x[~np.isnan(x)], None
+    y = _floats(y)
+    if len(x) != len(y):
+        raise ValueError("Both columns must have the same length.")
+    keep = ~(np.isnan(x) | np.isnan(y))
+    return x[keep], y[keep]
+
+
+def _estimate(statistic, x, y, q):
+    if statistic == "mean":
+        return x.mean()
+    if statistic == "ratio":
+        return x.sum() / y.sum()
+    return np.quantile(x, q)
+
+
+def _from_indexes(statistic, x, y, q, indexes):
+    # One row of indexes per replicate
+    if statistic == "mean":
+        return x[indexes].mean(axis=1)
+    if statistic == "ratio":
+        return x[indexes].sum(axis=1) / y[indexes].sum(axis=1)
+    return np.quantile(x[indexes], q, axis=1)
+
+
+def _from_counts(statistic, x, y, q, counts):
+    # counts[i] = how often row i was drawn; quantiles need x sorted
+    if statistic == "mean":
+        return counts @ x / counts.sum()
+    if statistic == "ratio":
+        return (counts @ x) / (counts @ y)
+    cumulative = np.cumsum(counts)
+    h = (cumulative[-1] - 1) * q
+    low = int(np.floor(h))
+    at = np.searchsorted(cumulative, [low + 1, min(low + 2, cumulative[-1])])
+    return x[at[0]] + (h - low) * (x[at[1]] - x[at[0]])
+
+
+def _replicate_block(statistic, x, y, q, size, seed, max_cells=MAX_CELLS):
+    # Runs in a worker process; each block has its own seed so results don't depend on the worker count
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    batch = max_cells // n
+    if batch >= MIN_BLOCK:
+        # Small n: whole replicates as a (batch, n) index matrix
+        out = [_from_indexes(statistic, x, y, q, rng.integers(0, n, size=(min(batch, size - start), n)))
+               for start in range(0, size, batch)]
+        return np.concatenate(out) if out else np.empty(0)
+    # Large n: each replicate becomes row counts, drawn max_cells indexes at a time
+    out = np.empty(size)
+    for r in range(size):
+        counts = np.zeros(n, dtype=np.int64)
+        for start in range(0, n, max_cells):
+            counts += np.bincount(rng.integers(0, n, size=min(max_cells, n - start)), minlength=n)
+        out[r] = _from_counts(statistic, x, y, q, counts)
+    return out
+
+
+def _jackknife(statistic, x, y, q):
+    # Leave-one-out values in O(n): closed forms for sums, order-statistic shifts for quantiles
+    n = len(x)
+    if statistic == "mean":
+        return (x.sum() - x) / (n - 1)
+    if statistic == "ratio":
+        return (x.sum() - x) / (y.sum() - y)
+    s = np.sort(x)
+    h = (n - 2) * q
+    low = int(np.floor(h))
+    high = min(low + 1, n - 2)
+    removed = np.arange(n)
+    # Without the value at sorted rank r, position j of what is left holds s[j + (j >= r)]
+    a = s[low + (low >= removed)]
+    b = s[high + (high >= removed)]
+    return a + (h - low) * (b - a)
+
+
+def _bca(statistic, x, y, q, estimate, replicates, alpha):
+    below = np.mean(replicates < estimate) + 0.5 * np.mean(replicates == estimate)
+    if below <= 0 or below >= 1:
+        raise ValueError("Every bootstrap replicate falls on one side of the estimate; use the percentile method.")
+    z0 = stats.norm.ppf(below)
+    jack = _jackknife(statistic, x, y, q)
+    d = jack.mean() - jack
+    spread = (d ** 2).sum()
+    acceleration = (d ** 3).sum() / (6 * spread ** 1.5) if spread > 0 else 0.0
+    z = stats.norm.ppf([alpha / 2, 1 - alpha / 2])
+    adjusted = stats.norm.cdf(z0 + (z0 + z) / (1 - acceleration * (z0 + z)))
+    return np.quantile(replicates, adjusted)
+
+
+def bootstrap(x, statistic="mean", y=None, q=50, confidence=0.95, method="percentile", replicates=2000,
+              seed=0, max_workers=None, max_cells=MAX_CELLS):
+    # Bootstrap interval for the mean, median, a percentile q (0-100) or the ratio sum(x) / sum(y).
+    # Replicates are drawn in blocks that run in worker processes once there is enough work
+    if statistic not in STATISTICS:
+        raise ValueError(f"Statistic must be one of: {', '.join(STATISTICS)}.")
+    if method not in METHODS:
+        raise ValueError(f"Method must be one of: {', '.join(METHODS)}.")
+    if statistic == "ratio" and y is None:
+        raise ValueError("A ratio needs a second column.")
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence must be between 0 and 1.")
+    x, y = _clean(x, y if statistic == "ratio" else None)
+    if len(x) < 3:
+        raise ValueError("At least 3 values are needed.")
+    q = 0.5 if statistic == "median" else float(q) / 100
+    if statistic in ("median", "percentile"):
+        x = np.sort(x)  # counts-based quantiles need sorted data; index draws don't care
+    estimate = _estimate(statistic, x, y, q)
+
+    replicates = int(replicates)
+    workers = max_workers or os.cpu_count() or 1
+    blocks = max(-(-replicates // BLOCK_REPLICATES), 1)
+    sizes = [replicates // blocks + (i < replicates % blocks) for i in range(blocks)]
+    seeds = np.random.SeedSequence(seed).spawn(blocks)
+    if replicates * len(x) >= PARALLEL_MIN_CELLS and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_replicate_block, [statistic] * blocks, [x] * blocks, [y] * blocks,
+                                  [q] * blocks, sizes, seeds, [max_cells] * blocks))
+    else:
+        parts = [_replicate_block(statistic, x, y, q, size, s, max_cells) for size, s in zip(sizes, seeds)]
+    values = np.concatenate(parts)
+    values = values[np.isfinite(values)]
+
+    alpha = 1 - confidence
+    if method == "bca":
+        interval = _bca(statistic, x, y, q, estimate, values, alpha)
+    else:
+        interval = np.quantile(values, [alpha / 2, 1 - alpha / 2])
+    return BootstrapResult(statistic, float(estimate), tuple(float(v) for v in interval), values, method, confidence)
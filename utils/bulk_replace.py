@@ -0,0 +1,161 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.dtype_optimizer import is_text
+
+# Distinct values per worker task, and the fewest distinct values worth starting worker processes for
+CHUNK_VALUES = 100_000
+PARALLEL_MIN_VALUES = 250_000
+SAMPLES = 3
+
+
+def is_text_column(s):
+    # Plain text columns and categoricals whose categories are text
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return is_text(pd.Series(s.cat.categories))
+    return is_text(s)
+
+
+def normalize_rules(rules):
+    # Each rule: {"pattern", "replacement", "columns" (empty = every text column), "ignore_case", "literal"}
+    normalized = []
+    for i, rule in enumerate(rules, start=1):
+        pattern = rule.get("pattern") or ""
+        if not pattern:
+            raise ValueError(f"Rule {i} has no pattern.")
+        replacement = rule.get("replacement") or ""
+        literal = bool(rule.get("literal", False))
+        if literal:
+            pattern = re.escape(pattern)
+            replacement = replacement.replace("\\", "\\\\")
+        flags = re.IGNORECASE if rule.get("ignore_case") else 0
+        try:
+            compiled = re.compile(pattern, flags)
+            compiled.sub(replacement, "")  # Bad group references only show up when substituting
+        except re.error as e:
+            raise ValueError(f"Rule {i} has an invalid pattern or replacement: {e}")
+        columns = rule.get("columns") or []
+        if isinstance(columns, str):
+            columns = [c.strip() for c in columns.split(",") if c.strip()]
+        normalized.append({"pattern": pattern, "flags": flags, "replacement": replacement, "columns": list(columns)})
+    return normalized
+
+
+def _targets(df, rules):
+    # column -> indexes of the rules that apply to it, in rule order
+    targets = {}
+    for i, rule in enumerate(rules):
+        for column in rule["columns"]:
+            if column not in df.columns:
+                raise ValueError(f"Column '{column}' does not exist.")
+            if not is_text_column(df[column]):
+                raise ValueError(f"Column '{column}' is not a text column.")
+        names = rule["columns"] or [c for c in df.columns if is_text_column(df[c])]
+        for column in names:
+            targets.setdefault(column, []).append(i)
+    return targets
+
+
+@lru_cache(maxsize=256)
+def _compiled(pattern, flags):
+    # Each worker process compiles a pattern the first time it sees it
+    return re.compile(pattern, flags)
+
+
+def _replace_chunk(rules, texts, dry_run):
+    # rules: ((pattern, flags, replacement), ...) applied in order; returns new texts (unless dry run)
+    # and the number of substitutions each rule made in each text
+    compiled = [(_compiled(pattern, flags), replacement) for pattern, flags, replacement in rules]
+    counts = np.zeros((len(compiled), len(texts)), dtype=np.int32)
+    out = [] if not dry_run else None
+    for j, text in enumerate(texts):
+        for i, (regex, replacement) in enumerate(compiled):
+            text, counts[i, j] = regex.subn(replacement, text)
+        if out is not None:
+            out.append(text)
+    return out, counts
+
+
+def _jobs(df, rules, targets):
+    for column, indexes in targets.items():
+        values = df[column]
+        codes, uniques = pd.factorize(values)
+        texts = [str(u) for u in uniques]
+        chunk_rules = tuple((rules[i]["pattern"], rules[i]["flags"], rules[i]["replacement"]) for i in indexes)
+        for start in range(0, max(len(texts), 1), CHUNK_VALUES):
+            yield column, codes, uniques, indexes, start, chunk_rules, texts[start:start + CHUNK_VALUES]
+
+
+def _run(df, rules, dry_run, max_workers=None):
+    targets = _targets(df, rules)
+    jobs = list(_jobs(df, rules, targets))
+    total = sum(len(job[-1]) for job in jobs)
+    if total >= PARALLEL_MIN_VALUES and (max_workers or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_replace_chunk, [job[5] for job in jobs], [job[6] for job in jobs],
+                                    [dry_run] * len(jobs)))
+    else:
+        results = [_replace_chunk(job[5], job[6], dry_run) for job in jobs]
+
+    # Stitch the chunks of each column back together
+    per_column = {}
+    for job, (texts, counts) in zip(jobs, results):
+        column, codes, uniques, indexes = job[:4]
+        entry = per_column.setdefault(column, {"codes": codes, "uniques": uniques, "indexes": indexes,
+                                               "texts": [], "counts": []})
+        if texts is not None:
+            entry["texts"].extend(texts)
+        entry["counts"].append(counts)
+    for entry in per_column.values():
+        entry["counts"] = np.concatenate(entry["counts"], axis=1) if entry["counts"] else np.zeros((0, 0))
+    return per_column
+
+
+def preview(df, rules, max_workers=None):
+    # Dry run: how many cells each rule would change in each column, with a few examples
+    rules = normalize_rules(rules)
+    rows = []
+    for column, entry in _run(df, rules, dry_run=True, max_workers=max_workers).items():
+        occurrences = np.bincount(entry["codes"][entry["codes"] >= 0], minlength=len(entry["uniques"]))
+        for k, i in enumerate(entry["indexes"]):
+            counts = entry["counts"][k]
+            hit = counts > 0
+            examples = [str(entry["uniques"][j]) for j in np.flatnonzero(hit)[:SAMPLES]]
+            rows.append({
+                "rule": i + 1,
+                "pattern": rules[i]["pattern"],
+                "column": column,
+                "cells_matched": int(occurrences[hit].sum()),
+                "replacements": int((counts.astype(np.int64) * occurrences).sum()),
+                "examples": examples,
+                "after": [_compiled(rules[i]["pattern"], rules[i]["flags"]).sub(rules[i]["replacement"], text)
+                          for text in examples],
+            })
+    return pd.DataFrame(rows, columns=["rule", "pattern", "column", "cells_matched", "replacements", "examples", "after"])
+
+
+def replace_columns(df, rules, max_workers=None):
+    # New values for every column a rule touched; each distinct value is rewritten once
+    rules = normalize_rules(rules)
+    changes = {}
+    for column, entry in _run(df, rules, dry_run=False, max_workers=max_workers).items():
+        if not entry["counts"].any():
+            continue
+        values = df[column]
+        codes = entry["codes"]
+        texts = np.array(entry["texts"], dtype=object)[codes]
+        missing = codes < 0
+        if missing.any():
+            texts[missing] = values.to_numpy(dtype=object)[missing]  # Missing cells keep their own null
+        new = pd.Series(texts, index=values.index, dtype=object)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            new = new.astype("category")
+        elif not pd.api.types.is_object_dtype(values.dtype):
+            new = new.astype(values.dtype)
+        changes[column] = new
+    return changes
@@ -0,0 +1,213 @@
+import inspect
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+
+from utils.bulk_replace import is_text_column, replace_columns
+from utils.duplicates import duplicate_mask, near_duplicate_clusters, near_duplicate_mask
+from utils.row_filter import build_mask, coerce_value
+from utils.type_conversion import ERRORS, convert
+
+
+@dataclass
+class Change:
+    # What a cleaning step does to a frame, computed before anything is modified
+    columns: dict = field(default_factory=dict)  # name -> new values
+    drop_columns: list = field(default_factory=list)
+    drop_rows: np.ndarray = None  # positions
+    order: np.ndarray = None  # row permutation for df.take
+    set_index: str = None
+    reset_index: bool = False
+
+
+def _require_column(df, column):
+    if column not in df.columns:
+        raise ValueError(f"Column '{column}' does not exist.")
+
+
+def drop_columns(df, columns):
+    for column in columns:
+        _require_column(df, column)
+    return Change(drop_columns=list(columns))
+
+
+def strip(df, column, side="Both", chars=""):
+    _require_column(df, column)
+    if not is_text_column(df[column]):
+        raise ValueError("Please ensure the column exists and is a string type.")
+    chars = chars or None
+    if side == 'Right':
+        new = df[column].str.rstrip(chars)
+    elif side == 'Left':
+        new = df[column].str.lstrip(chars)
+    elif side == 'Both':
+        new = df[column].str.strip(chars)
+    else:
+        raise ValueError("Please enter valid input!")
+    return Change(columns={column: new})
+
+
+def replace(df, column, pattern, replacement):
+    _require_column(df, column)
+    if not is_text_column(df[column]):
+        raise ValueError("Please Convert the Column to String First")
+    return Change(columns={column: df[column].str.replace(pattern, replacement, regex=True)})
+
+
+def bulk_replace(df, rules):
+    return Change(columns=replace_columns(df, rules))
+
+
+def _fill_value(values, value):
+    # The typed value in the column's own type, so a fill never turns numbers or dates into text
+    if isinstance(value, str):
+        value = coerce_value(values, value)
+    elif is_text_column(values):
+        value = str(value)
+    if ptypes.is_integer_dtype(values) and not float(value).is_integer():
+        raise ValueError(f"'{value}' is not a whole number")
+    return value
+
+
+def fillna(df, value):
+    columns = {}
+    failed = []
+    for column in df.columns[df.isna().any().to_numpy()]:
+        values = df[column]
+        try:
+            fill = _fill_value(values, value)
+        except ValueError as e:
+            failed.append(f"'{column}' ({e})")
+            continue
+        # Categorical columns only accept values that are already one of their categories
+        if isinstance(values.dtype, pd.CategoricalDtype) and fill not in values.cat.categories:
+            values = values.cat.add_categories([fill])
+        columns[column] = values.fillna(fill)
+    if failed:
+        raise ValueError(f"The value doesn't fit these columns: {', '.join(failed)}.")
+    return Change(columns=columns)
+
+
+def dropna(df):
+    return Change(drop_rows=np.flatnonzero(df.isna().any(axis=1).to_numpy()))
+
+
+def drop_duplicates(df, subset=None, keep="first"):
+    return Change(drop_rows=np.flatnonzero(duplicate_mask(df, subset, keep)))
+
+
+def drop_near_duplicates(df, columns, threshold=0.9, blocking="prefix"):
+    clusters = near_duplicate_clusters(df, columns, float(threshold), blocking)
+    return Change(drop_rows=np.flatnonzero(near_duplicate_mask(clusters)))
+
+
+def drop_rows(df, column, operator, value="", upper=""):
+    _require_column(df, column)
+    try:
+        matches = build_mask(df[column], operator, value, upper)
+    except (ValueError, TypeError, re.error) as e:
+        raise ValueError(f"Invalid condition: {e}")
+    return Change(drop_rows=np.flatnonzero(matches))
+
+
+def set_index(df, column):
+    _require_column(df, column)
+    return Change(set_index=column)
+
+
+def reset_index(df):
+    return Change(reset_index=True)
+
+
+def change_type(df, column, to, locale="en-US", date_format="", places=None, errors="raise"):
+    # Only the converted column is built; with errors="raise" nothing is applied if any value fails
+    _require_column(df, column)
+    if errors not in ERRORS:
+        raise ValueError(f"errors must be one of: {', '.join(ERRORS)}.")
+    result = convert(df[column], to, locale, date_format, places)
+    if result.n_failed and errors == "raise":
+        raise ValueError(result.message(df[column]))
+    return Change(columns={column: result.values})
+
+
+def sort(df, column, ascending=True):
+    _require_column(df, column)
+    order = df[column].reset_index(drop=True).sort_values(ascending=ascending, kind='stable').index.to_numpy()
+    return Change(order=order)
+
+
+OPERATIONS = {
+    "drop_columns": drop_columns,
+    "strip": strip,
+    "replace": replace,
+    "bulk_replace": bulk_replace,
+    "fillna": fillna,
+    "dropna": dropna,
+    "drop_duplicates": drop_duplicates,
+    "drop_near_duplicates": drop_near_duplicates,
+    "drop_rows": drop_rows,
+    "set_index": set_index,
+    "reset_index": reset_index,
+    "change_type": change_type,
+    "sort": sort,
+}
+
+
+def plan_step(df, step):
+    op = OPERATIONS.get(step["op"])
+    if op is None:
+        raise ValueError(f"Unknown cleaning step '{step['op']}'.")
+    # Only a mismatch with the operation's signature is reported as bad arguments;
+    # a TypeError raised while the step runs is a bug and is left alone
+    args = step.get("args", {})
+    try:
+        inspect.signature(op).bind(df, **args)
+    except TypeError as e:
+        raise ValueError(f"Invalid arguments for '{step['op']}': {e}")
+    return op(df, **args)
+
+
+def apply_change(df, change, history=None):
+    # Records the change for undo when a history is given, then applies it; may return a new frame
+    if change.drop_columns:
+        if history is not None:
+            history.record_columns(df, change.drop_columns)
+        df.drop(columns=change.drop_columns, inplace=True)
+    if change.columns:
+        if history is not None:
+            history.record_cells(df, change.columns)
+        for column, values in change.columns.items():
+            df[column] = values
+    if change.drop_rows is not None:
+        if history is not None:
+            history.record_rows(df, change.drop_rows)
+        keep = np.ones(len(df), dtype=bool)
+        keep[change.drop_rows] = False
+        df = df[keep]
+    if change.order is not None:
+        if history is not None:
+            history.record_order(change.order)
+        df = df.take(change.order)
+    if change.set_index is not None:
+        if history is not None:
+            history.record_columns(df, [change.set_index], with_index=True)
+        df.set_index(change.set_index, inplace=True)
+    if change.reset_index:
+        if history is not None:
+            history.record_index(df)
+        df.reset_index(drop=True, inplace=True)
+    return df
+
+
+def apply_step(df, step, history=None):
+    change = plan_step(df, step)
+    if history is None:
+        return apply_change(df, change), change
+    recorded = history.recorded
+    df = apply_change(df, change, history)
+    if history.recorded == recorded:
+        history.record_noop()  # Every step gets an undo entry, so undo and the recipe stay in step
+    return df, change
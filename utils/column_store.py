@@ -0,0 +1,91 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pyarrow as pa
+
+
+class ColumnStore:
+    def __init__(self, root=Path("data/datasets"), max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv('COLUMN_STORE_MB', '4096')) * 1024 * 1024
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return self.root / f"{name}.arrow"
+
+    def has(self, key):
+        return self.path(key).exists()
+
+    def save(self, key, df):
+        # Arrow IPC files are written uncompressed so they can be memory-mapped back.
+        # Arrow stores column labels as strings, so frames with other labels (e.g. a 2019 year
+        # header) would come back renamed; those are not stored at all
+        if not all(isinstance(name, str) for name in df.columns):
+            return None
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=None)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return None
+        path = self.path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        self._prune(keep=path)
+        return path
+
+    def _prune(self, keep=None):
+        # Least recently used files go first once the store is over its size limit
+        files = []
+        for path in self.root.glob("*.arrow"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _open(self, key):
+        path = self.path(key)
+        os.utime(path)  # Marks the file as recently used for _prune
+        source = pa.memory_map(str(path), "r")
+        return pa.ipc.open_file(source).read_all()
+
+    @staticmethod
+    def _index_columns(table):
+        metadata = table.schema.pandas_metadata or {}
+        # Range indexes are stored as metadata only; the rest are real columns
+        return [name for name in metadata.get("index_columns", []) if isinstance(name, str)]
+
+    def columns(self, key):
+        table = self._open(key)
+        index_cols = self._index_columns(table)
+        return [name for name in table.column_names if name not in index_cols]
+
+    def load(self, key, columns=None, limit=None):
+        table = self._open(key)
+        if columns is not None:
+            # Keep the index columns so the frame comes back with its original labels
+            table = table.select(list(dict.fromkeys(columns)) + self._index_columns(table))
+        if limit is not None:
+            table = table.slice(0, limit)
+        # Only the selected column buffers are paged in from the mapped file
+        return table.to_pandas()
+
+    def remove(self, key):
+        self.path(key).unlink(missing_ok=True)
+
+
+column_store = ColumnStore()
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+# Digests of files already hashed in this process, keyed by the uploader's file id,
+# so a rerun doesn't re-hash hundreds of megabytes just to find a cache hit.
+_digests = OrderedDict()
+_digests_lock = threading.Lock()
+_MAX_DIGESTS = 256
+
+
+def file_digest(file, chunk_size=1 << 20):
+    file_id = getattr(file, "file_id", None)
+    if file_id is not None:
+        # Sessions run on their own threads; the lock is not held while hashing
+        with _digests_lock:
+            if file_id in _digests:
+                _digests.move_to_end(file_id)
+                return _digests[file_id]
+
+    h = hashlib.blake2b(digest_size=16)
+    if hasattr(file, "getbuffer"):
+        h.update(file.getbuffer())
+    else:
+        pos = file.tell()
+        file.seek(0)
+        for block in iter(lambda: file.read(chunk_size), b""):
+            h.update(block)
+        file.seek(pos)
+    digest = h.hexdigest()
+
+    if file_id is not None:
+        with _digests_lock:
+            _digests[file_id] = digest
+            _digests.move_to_end(file_id)
+            while len(_digests) > _MAX_DIGESTS:
+                _digests.popitem(last=False)
+    return digest
+
+
+def dataset_key(file, options=None):
+    options = options or {}
+    return (file_digest(file), tuple(sorted(options.items())))
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class DatasetCache:
+    def __init__(self, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv('DATASET_CACHE_MB', '2048')) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, df):
+        size = frame_nbytes(df)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            # A frame bigger than the whole budget would just flush everything else
+            if size > self.max_bytes:
+                return False
+            self._entries[key] = (df, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+            return True
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+# Module state is shared by every session served from this process
+dataset_cache = DatasetCache()
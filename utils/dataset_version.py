@@ -0,0 +1,12 @@
+def bump_version(state):
+    state["df_version"] = state.get("df_version", 0) + 1
+
+
+def reset_version(state):
+    state["df_version"] = 0
+
+
+def dataset_identity(state):
+    # Uploads are identified by their content key; web tables by the extracted frame they came from
+    source = state.get("df_key") if "uploaded_file" in state else id(state.get("df_source"))
+    return (source, state.get("df_version", 0))
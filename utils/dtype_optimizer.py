@@ -0,0 +1,85 @@
+import pandas as pd
+from pandas.api import types as ptypes
+from pandas.tseries.api import guess_datetime_format
+
+# A text column becomes categorical when at most this share of its values are distinct
+CATEGORY_RATIO = 0.5
+DATE_SAMPLE = 1000
+DATE_PATTERN = r"\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}|[A-Za-z]{3,}\.? \d{1,2}"
+
+
+def is_text(s):
+    return (ptypes.is_object_dtype(s) or ptypes.is_string_dtype(s)) and not isinstance(s.dtype, pd.CategoricalDtype)
+
+
+def parse_dates(s):
+    non_null = s.dropna()
+    if non_null.empty:
+        return None
+    sample = non_null.head(DATE_SAMPLE).astype(str)
+    if not sample.str.contains(DATE_PATTERN, regex=True).all():
+        return None
+    # One format parsed in C is far faster than format='mixed', which parses value by value;
+    # mixed is only the fallback for columns no single format guessed from the sample covers
+    for dayfirst in (False, True):
+        fmt = guess_datetime_format(sample.iloc[0], dayfirst=dayfirst)
+        if fmt is None or pd.to_datetime(sample, errors='coerce', format=fmt).isna().any():
+            continue
+        parsed = pd.to_datetime(s, errors='coerce', format=fmt)
+        if parsed.notna().sum() == len(non_null):
+            return parsed
+    if pd.to_datetime(sample, errors='coerce', format='mixed').isna().any():
+        return None
+    parsed = pd.to_datetime(s, errors='coerce', format='mixed')
+    # Only accept the conversion when it doesn't turn any real value into NaT
+    if parsed.notna().sum() != len(non_null):
+        return None
+    return parsed
+
+
+def _same_results(before, after):
+    # A compact column is only kept when sum, mean and std come out exactly as before
+    return all(
+        (pd.isna(a) and pd.isna(b)) or a == b
+        for a, b in ((before.sum(), after.sum()), (before.mean(), after.mean()), (before.std(), after.std()))
+    )
+
+
+def optimize_column(s):
+    if ptypes.is_bool_dtype(s):
+        return s
+    if ptypes.is_integer_dtype(s):
+        downcast = 'unsigned' if len(s) and s.min() >= 0 else 'integer'
+        down = pd.to_numeric(s, downcast=downcast)
+        return down if _same_results(s, down) else s
+    if ptypes.is_float_dtype(s):
+        # Floats stay float64: float32 values can round-trip exactly and still accumulate
+        # sums and moments in float32, which changes what the Analyse page shows
+        return s
+    if is_text(s):
+        parsed = parse_dates(s)
+        if parsed is not None:
+            return parsed
+        if len(s) and s.nunique(dropna=True) <= CATEGORY_RATIO * len(s):
+            return s.astype('category')
+    return s
+
+
+def optimize_dtypes(df):
+    rows = []
+    for i, col in enumerate(df.columns):
+        before = df.iloc[:, i]
+        after = optimize_column(before)
+        before_bytes = int(before.memory_usage(index=False, deep=True))
+        after_bytes = int(after.memory_usage(index=False, deep=True))
+        rows.append({
+            'column': col,
+            'dtype_before': str(before.dtype),
+            'dtype_after': str(after.dtype),
+            'bytes_before': before_bytes,
+            'bytes_after': after_bytes,
+        })
+        if after is not before:
+            # Replaced one column at a time so the old and new frame never coexist
+            df.isetitem(i, after)
+    return pd.DataFrame(rows, columns=['column', 'dtype_before', 'dtype_after', 'bytes_before', 'bytes_after'])
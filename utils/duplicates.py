@@ -0,0 +1,165 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 500_000
+KEEP = {"first": "first", "last": "last", "none": False}
+BLOCKING = ["prefix", "tokens"]
+PREFIX_CHARS = 4
+WINDOW = 20  # neighbours compared inside a block after sorting
+MAX_GROUPS = 50
+
+
+def _subset(df, subset):
+    columns = list(subset) if subset else list(df.columns)
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"Column '{missing[0]}' does not exist.")
+    return columns
+
+
+def row_fingerprints(df, subset=None, chunk_rows=CHUNK_ROWS):
+    # One 64-bit hash per row, built a chunk at a time so no second copy of the frame is made
+    columns = _subset(df, subset)
+    out = np.empty(len(df), dtype=np.uint64)
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows][columns]
+        out[start:start + len(chunk)] = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    return out
+
+
+def _same_rows(df, columns, left, right):
+    # Confirms fingerprint matches cell by cell, so a hash collision can never drop a row
+    same = np.ones(len(left), dtype=bool)
+    for column in columns:
+        a = df[column].iloc[left].to_numpy()
+        b = df[column].iloc[right].to_numpy()
+        both_missing = pd.isna(a) & pd.isna(b)
+        same &= both_missing | (a == b)
+    return same
+
+
+def duplicate_mask(df, subset=None, keep="first"):
+    # Rows to remove: every repeat of an earlier (or later, or any other) row on the chosen columns
+    if keep not in KEEP:
+        raise ValueError(f"Keep must be one of: {', '.join(KEEP)}.")
+    columns = _subset(df, subset)
+    codes, _ = pd.factorize(row_fingerprints(df, columns))
+    mask = pd.Series(codes).duplicated(keep=KEEP[keep]).to_numpy(copy=True)
+    if mask.any():
+        # Check each flagged row against a row it supposedly repeats
+        positions = np.flatnonzero(mask)
+        firsts = np.unique(codes, return_index=True)[1]  # codes are numbered in order of first appearance
+        lasts = len(codes) - 1 - np.unique(codes[::-1], return_index=True)[1]
+        reference = lasts[codes[positions]] if keep == "last" else firsts[codes[positions]]
+        # With keep="none" the first row of a group is flagged too; compare it with the last one
+        reference = np.where(reference == positions, lasts[codes[positions]], reference)
+        for start in range(0, len(positions), CHUNK_ROWS):
+            part = slice(start, start + CHUNK_ROWS)
+            mask[positions[part][~_same_rows(df, columns, positions[part], reference[part])]] = False
+    return mask
+
+
+def duplicate_groups(df, subset=None, max_groups=MAX_GROUPS):
+    # Groups of identical rows, largest first, so they can be reviewed before anything is deleted
+    columns = _subset(df, subset)
+    codes, _ = pd.factorize(row_fingerprints(df, columns))
+    counts = np.bincount(codes) if len(codes) else np.zeros(0, dtype=np.int64)
+    repeated = np.flatnonzero(counts > 1)
+    summary = pd.DataFrame({"group": repeated, "rows": counts[repeated]})
+    summary = summary.sort_values(["rows", "group"], ascending=[False, True], kind="stable")
+    shown = summary["group"].to_numpy()[:max_groups]
+    positions = np.flatnonzero(np.isin(codes, shown))
+    rows = df.iloc[positions][columns].copy()
+    rows.insert(0, "group", codes[positions])
+    rows = rows.sort_values("group", kind="stable")
+    return summary.reset_index(drop=True), rows
+
+
+def normalize_text(values):
+    # Lower case, accents and punctuation removed, whitespace collapsed
+    def clean(text):
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+        text = re.sub(r"[^\w\s]", " ", text.lower())
+        return " ".join(text.split())
+    return [clean(str(v)) for v in values]
+
+
+def _blocking_key(text):
+    return text[:PREFIX_CHARS]
+
+
+def _similar(a, b, threshold):
+    if a == b:
+        return True
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    return matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold and matcher.ratio() >= threshold
+
+
+def near_duplicate_clusters(df, columns, threshold=0.9, blocking="prefix", window=WINDOW):
+    # Cluster id per row (-1 for rows with no near duplicate). Only distinct normalized values are
+    # compared, and only against neighbours within the same blocking key
+    if not columns:
+        raise ValueError("Choose at least one text column.")
+    if blocking not in BLOCKING:
+        raise ValueError(f"Blocking must be one of: {', '.join(BLOCKING)}.")
+    _subset(df, columns)
+    joined = df[columns[0]].astype(str) if len(columns) == 1 else df[columns].astype(str).agg(" ".join, axis=1)
+    present = df[columns].notna().all(axis=1).to_numpy()
+    codes, uniques = pd.factorize(joined.where(present))
+    normalized = normalize_text(uniques)
+    if blocking == "tokens":
+        # Word order is ignored: "Smith, John" and "john smith" become the same text
+        normalized = [" ".join(sorted(text.split())) for text in normalized]
+
+    parent = np.arange(len(normalized))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    blocks = {}
+    for i, text in enumerate(normalized):
+        if text:
+            blocks.setdefault(_blocking_key(text), []).append(i)
+    for members in blocks.values():
+        members.sort(key=lambda i: normalized[i])
+        for a_pos, a in enumerate(members):
+            for b in members[a_pos + 1:a_pos + 1 + window]:
+                if find(a) != find(b) and _similar(normalized[a], normalized[b], threshold):
+                    parent[find(b)] = find(a)
+
+    roots = np.array([find(i) for i in range(len(normalized))], dtype=np.int64)
+    row_roots = np.where(codes >= 0, roots[codes.clip(0)], -1)
+    # Rows whose root is shared with another row form a cluster; renumber clusters 0..k-1
+    valid = row_roots >= 0
+    sizes = np.bincount(row_roots[valid], minlength=len(normalized))
+    clustered = valid & (sizes[row_roots.clip(0)] > 1)
+    cluster_ids = np.full(len(df), -1, dtype=np.int64)
+    if clustered.any():
+        cluster_ids[clustered], _ = pd.factorize(row_roots[clustered])
+    return cluster_ids
+
+
+def near_duplicate_mask(cluster_ids):
+    # Keeps the first row of each cluster
+    mask = pd.Series(cluster_ids).duplicated(keep="first").to_numpy()
+    return mask & (cluster_ids >= 0)
+
+
+def near_duplicate_groups(df, columns, cluster_ids, max_groups=MAX_GROUPS):
+    clustered = np.flatnonzero(cluster_ids >= 0)
+    counts = np.bincount(cluster_ids[clustered]) if len(clustered) else np.zeros(0, dtype=np.int64)
+    summary = pd.DataFrame({"group": np.arange(len(counts)), "rows": counts})
+    summary = summary.sort_values(["rows", "group"], ascending=[False, True], kind="stable").reset_index(drop=True)
+    shown = summary["group"].to_numpy()[:max_groups]
+    positions = clustered[np.isin(cluster_ids[clustered], shown)]
+    rows = df.iloc[positions][list(columns)].copy()
+    rows.insert(0, "group", cluster_ids[positions])
+    return summary, rows.sort_values("group", kind="stable")
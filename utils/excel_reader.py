@@ -0,0 +1,94 @@
+import io
+import os
+import posixpath
+import re
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from openpyxl import load_workbook
+
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+DIMENSION_PATTERN = re.compile(rb'<(?:\w+:)?dimension ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"')
+
+
+def _column_number(letters):
+    # letters are the raw bytes of a cell reference like b"AB"
+    n = 0
+    for ch in letters:
+        n = n * 26 + ch - 64
+    return n
+
+
+def _sheet_dimension(zf, path):
+    # The <dimension> element sits at the top of the sheet part, so a few KB is enough
+    try:
+        with zf.open(path) as part:
+            head = part.read(4096)
+    except KeyError:
+        return None, None
+    match = DIMENSION_PATTERN.search(head)
+    if not match or match.group(3) is None:
+        return None, None
+    rows = int(match.group(4)) - int(match.group(2)) + 1
+    cols = _column_number(match.group(3)) - _column_number(match.group(1)) + 1
+    return rows, cols
+
+
+def list_sheets(source):
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    # Reads only the workbook and relationship parts; no cell data is loaded
+    with zipfile.ZipFile(source) as zf:
+        workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+        rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{PKG_REL_NS}Relationship")}
+        sheets = []
+        for sheet in workbook.iter(f"{MAIN_NS}sheet"):
+            target = targets.get(sheet.get(f"{REL_NS}id"), "")
+            path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+            rows, cols = _sheet_dimension(zf, path)
+            sheets.append({
+                "name": sheet.get("name"),
+                "hidden": sheet.get("state", "visible") != "visible",
+                "rows": rows,
+                "columns": cols,
+            })
+    return sheets
+
+
+def read_sheet(source, sheet=None):
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    # read_only mode streams rows from the sheet XML instead of building the full cell model
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        df = pd.DataFrame(rows, columns=list(header))
+    finally:
+        wb.close()
+    return df.infer_objects()
+
+
+def read_sheets(data, sheets, max_workers=None):
+    if len(sheets) <= 1:
+        return {sheet: read_sheet(data, sheet) for sheet in sheets}
+
+    max_workers = min(len(sheets), max_workers or os.cpu_count() or 1)
+    # Workers open the workbook from disk rather than each receiving a pickled copy of the bytes
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as tmp:
+        tmp.write(data)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            frames = pool.map(read_sheet, [tmp.name] * len(sheets), sheets)
+            return dict(zip(sheets, frames))
+    finally:
+        os.unlink(tmp.name)
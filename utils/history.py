@@ -0,0 +1,279 @@
+import os
+import pickle
+import shutil
+import uuid
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Columns where more than this share of cells changed are stored whole rather than cell by cell
+CELL_DELTA_RATIO = 0.5
+
+
+def _nbytes(obj):
+    if obj is None:
+        return 0
+    if isinstance(obj, (pd.Series, pd.DataFrame)):
+        usage = obj.memory_usage(index=True, deep=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage)
+    if isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=True))
+    return int(getattr(obj, "nbytes", 0))
+
+
+class ColumnsDelta:
+    # Restores whole columns (None means the column did not exist), the column order and optionally the index
+    def __init__(self, columns, order, index=None):
+        self.columns = columns
+        self.order = order
+        self.index = index
+        self.nbytes = sum(_nbytes(v) for v in columns.values()) + _nbytes(index)
+
+    @classmethod
+    def capture(cls, df, names, with_index=False):
+        columns = {name: (df[name].copy() if name in df.columns else None) for name in names}
+        return cls(columns, list(df.columns), df.index.copy() if with_index else None)
+
+    def apply(self, df):
+        inverse = ColumnsDelta.capture(df, list(self.columns), with_index=self.index is not None)
+        if self.index is not None:
+            df.index = self.index
+        for name, values in self.columns.items():
+            if values is None:
+                if name in df.columns:
+                    df.drop(columns=name, inplace=True)
+            else:
+                df[name] = values
+        return df[self.order] if list(df.columns) != self.order else df, inverse
+
+
+class CellsDelta:
+    # Restores only the cells that an action changed in one column
+    def __init__(self, column, positions, values):
+        self.column = column
+        self.positions = positions
+        self.values = values
+        self.nbytes = _nbytes(positions) + _nbytes(values)
+
+    def apply(self, df):
+        loc = df.columns.get_loc(self.column)
+        current = df.iloc[self.positions, loc].copy()
+        inverse = CellsDelta(self.column, self.positions, current)
+        df.iloc[self.positions, loc] = self.values.to_numpy() if hasattr(self.values, "to_numpy") else self.values
+        return df, inverse
+
+
+class RowsDelta:
+    # Puts removed rows back at their original positions
+    def __init__(self, positions, rows):
+        self.positions = positions
+        self.rows = rows
+        self.nbytes = _nbytes(positions) + _nbytes(rows)
+
+    def apply(self, df):
+        total = len(df) + len(self.rows)
+        # source[i] is the row of concat([df, rows]) that ends up at position i
+        source = np.empty(total, dtype=np.int64)
+        kept = np.setdiff1d(np.arange(total), self.positions, assume_unique=True)
+        source[kept] = np.arange(len(df))
+        source[self.positions] = len(df) + np.arange(len(self.rows))
+        restored = pd.concat([df, self.rows]).take(source)
+        return restored, DropRowsDelta(self.positions)
+
+
+class DropRowsDelta:
+    def __init__(self, positions):
+        self.positions = positions
+        self.nbytes = _nbytes(positions)
+
+    def apply(self, df):
+        rows = df.take(self.positions)
+        keep = np.ones(len(df), dtype=bool)
+        keep[self.positions] = False
+        return df[keep], RowsDelta(self.positions, rows)
+
+
+class OrderDelta:
+    # Re-applies a row permutation; the inverse is the inverse permutation
+    def __init__(self, permutation):
+        self.permutation = permutation
+        self.nbytes = _nbytes(permutation)
+
+    def apply(self, df):
+        return df.take(self.permutation), OrderDelta(np.argsort(self.permutation, kind="stable"))
+
+
+class CompositeDelta:
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.nbytes = sum(delta.nbytes for delta in deltas)
+
+    def apply(self, df):
+        inverses = []
+        for delta in reversed(self.deltas):
+            df, inverse = delta.apply(df)
+            inverses.append(inverse)
+        return df, CompositeDelta(inverses)
+
+
+class SpilledDelta:
+    def __init__(self, path, nbytes):
+        self.path = path
+        self.spilled_bytes = nbytes
+        self.nbytes = 0
+
+    def load(self):
+        with open(self.path, 'rb') as f:
+            delta = pickle.load(f)
+        self.discard()
+        return delta
+
+    def discard(self):
+        Path(self.path).unlink(missing_ok=True)
+
+
+class History:
+    def __init__(self, max_bytes=None, spill_dir=Path("data/history"), max_spilled_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv('UNDO_BUDGET_MB', '512')) * 1024 * 1024
+        if max_spilled_bytes is None:
+            max_spilled_bytes = int(os.getenv('UNDO_SPILL_MB', '4096')) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.max_spilled_bytes = max_spilled_bytes
+        self.spill_dir = Path(spill_dir) / uuid.uuid4().hex if spill_dir is not None else None
+        self.undo_stack = []
+        self.redo_stack = []
+        self.collapsed = 0
+        self._group = None
+        self.recorded = 0  # entries pushed so far, grouped or not
+        if self.spill_dir is not None:
+            weakref.finalize(self, shutil.rmtree, str(self.spill_dir), True)
+
+    def __len__(self):
+        return len(self.undo_stack)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    @property
+    def memory_bytes(self):
+        return sum(entry.nbytes for entry in self.undo_stack + self.redo_stack)
+
+    @property
+    def spilled_bytes(self):
+        return sum(getattr(entry, "spilled_bytes", 0) for entry in self.undo_stack + self.redo_stack)
+
+    # ---- recording: call these before the frame is changed ----
+    def record_columns(self, df, names, with_index=False):
+        self._push(ColumnsDelta.capture(df, names, with_index=with_index))
+
+    def record_index(self, df):
+        self._push(ColumnsDelta.capture(df, [], with_index=True))
+
+    def record_cells(self, df, changes):
+        # changes maps column name -> the new values about to be assigned
+        deltas = []
+        for name, new in changes.items():
+            if name not in df.columns:
+                deltas.append(ColumnsDelta.capture(df, [name]))
+                continue
+            old = df[name]
+            if old.dtype != new.dtype or not old.index.equals(new.index):
+                deltas.append(ColumnsDelta.capture(df, [name]))
+                continue
+            changed = old.ne(new) & ~(old.isna() & new.isna())
+            positions = np.flatnonzero(changed.to_numpy())
+            if len(positions) > CELL_DELTA_RATIO * len(old):
+                deltas.append(ColumnsDelta.capture(df, [name]))
+            elif len(positions):
+                deltas.append(CellsDelta(name, positions, old.iloc[positions].copy()))
+        if deltas:
+            self._push(deltas[0] if len(deltas) == 1 else CompositeDelta(deltas))
+
+    def record_rows(self, df, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        if len(positions):
+            self._push(RowsDelta(positions, df.take(positions)))
+
+    def record_noop(self):
+        # Keeps one undo step per action even when the action changed nothing
+        self._push(CompositeDelta([]))
+
+    @contextmanager
+    def grouped(self):
+        # Everything recorded inside the block becomes one undo step; on error the partial entries are
+        # returned unrecorded through the yielded list so the caller can roll them back
+        self._group = entries = []
+        try:
+            yield entries
+        except BaseException:
+            self._group = None
+            raise
+        self._group = None
+        self._push(entries[0] if len(entries) == 1 else CompositeDelta(entries))
+
+    def record_order(self, positions):
+        # positions is the permutation about to be applied with df.take
+        self._push(OrderDelta(np.argsort(np.asarray(positions), kind="stable")))
+
+    # ---- undo / redo ----
+    def undo(self, df):
+        return self._move(df, self.undo_stack, self.redo_stack)
+
+    def redo(self, df):
+        return self._move(df, self.redo_stack, self.undo_stack)
+
+    def _move(self, df, source, target):
+        if not source:
+            return df
+        entry = source.pop()
+        if isinstance(entry, SpilledDelta):
+            entry = entry.load()
+        df, inverse = entry.apply(df)
+        target.append(inverse)
+        self._enforce_budget()
+        return df
+
+    def _push(self, delta):
+        self.recorded += 1
+        if self._group is not None:
+            self._group.append(delta)
+            return
+        self.undo_stack.append(delta)
+        for entry in self.redo_stack:
+            if isinstance(entry, SpilledDelta):
+                entry.discard()
+        self.redo_stack = []
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        # Oldest undo steps go to disk first; once the spill budget is used up they are dropped
+        while self.memory_bytes > self.max_bytes:
+            entry = next((e for e in self.undo_stack if not isinstance(e, SpilledDelta)), None)
+            if entry is None:
+                break
+            i = self.undo_stack.index(entry)
+            if self.spill_dir is not None and self.spilled_bytes + entry.nbytes <= self.max_spilled_bytes:
+                self.undo_stack[i] = self._spill(entry)
+            else:
+                for dropped in self.undo_stack[:i + 1]:
+                    if isinstance(dropped, SpilledDelta):
+                        dropped.discard()
+                del self.undo_stack[:i + 1]
+                self.collapsed += i + 1
+        while self.spilled_bytes > self.max_spilled_bytes and self.undo_stack:
+            oldest = self.undo_stack.pop(0)
+            if isinstance(oldest, SpilledDelta):
+                oldest.discard()
+            self.collapsed += 1
+
+    def _spill(self, delta):
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spill_dir / f"{uuid.uuid4().hex}.pkl"
+        with open(path, 'wb') as f:
+            pickle.dump(delta, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return SpilledDelta(path, delta.nbytes)
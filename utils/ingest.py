@@ -0,0 +1,174 @@
+from collections import OrderedDict
+
+import pandas as pd
+from pandas.api import types as ptypes
+
+from utils.archive_reader import compression_of, inner_name, list_members, open_stream
+from utils.column_store import column_store
+from utils.dataset_cache import dataset_cache, dataset_key
+from utils.dtype_optimizer import optimize_dtypes
+from utils.excel_reader import list_sheets, read_sheet, read_sheets
+
+CHUNK_ROWS = 100_000
+
+# Per-column memory reports from the dtype pass, keyed like the dataset cache
+_dtype_reports = OrderedDict()
+_MAX_REPORTS = 64
+
+
+def _file_size(file):
+    size = getattr(file, "size", None)
+    if size is None:
+        pos = file.tell()
+        size = file.seek(0, 2)
+        file.seek(pos)
+    return size
+
+
+def _file_bytes(file):
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    file.seek(0)
+    return file.read()
+
+
+def excel_sheets(file):
+    file.seek(0)
+    return list_sheets(file)
+
+
+def _conflicting(pieces):
+    # Chunks infer their own dtypes: a column read as numbers early on and as text later
+    # would mix 7 and '7'. Chunks with no values say nothing about the type
+    kinds = {ptypes.is_numeric_dtype(piece) for piece in pieces if piece.notna().any()}
+    return len(kinds) > 1
+
+
+def read_delimited(file, sep=",", chunksize=CHUNK_ROWS, on_progress=None, on_chunk=None, source=None, reopen=None):
+    # source is the raw upload when file is a decompressing stream over it,
+    # so progress is reported against the bytes actually received. reopen returns a fresh
+    # stream over the same data, used to re-read columns whose chunks disagree on the type
+    source = source if source is not None else file
+    total_bytes = _file_size(source)
+    columns = None
+    pieces = []
+    rows = 0
+    with pd.read_csv(file, sep=sep, chunksize=chunksize) as reader:
+        for chunk in reader:
+            if columns is None:
+                columns = chunk.columns
+                pieces = [[] for _ in columns]
+                if on_chunk is not None:
+                    on_chunk(chunk)
+            # Split the chunk into per-column copies so its block can be freed right away
+            for i in range(len(columns)):
+                pieces[i].append(chunk.iloc[:, i].copy())
+            rows += len(chunk)
+            del chunk
+            if on_progress is not None:
+                on_progress(min(source.tell(), total_bytes), total_bytes, rows)
+
+    if columns is None:
+        # Header-only file: let pandas build the empty frame with its columns
+        if source is not file:
+            raise ValueError("The file contains no rows.")
+        file.seek(0)
+        return pd.read_csv(file, sep=sep)
+
+    # Concatenate one column at a time and release its pieces immediately,
+    # so peak memory stays near the final frame size plus a single column
+    data = {}
+    mixed = []
+    for i in range(len(columns)):
+        if _conflicting(pieces[i]):
+            mixed.append(i)
+        else:
+            data[i] = pd.concat(pieces[i], ignore_index=True)
+        pieces[i] = None
+    if mixed:
+        # Read those columns again as text, as a single read_csv would give them
+        stream = reopen() if reopen is not None else file
+        if reopen is None:
+            file.seek(0)
+        try:
+            text = pd.read_csv(stream, sep=sep, usecols=mixed, dtype=str)
+        finally:
+            if stream is not file:
+                stream.close()
+        for position, i in enumerate(mixed):
+            data[i] = text.iloc[:, position]
+        data = {i: data[i] for i in range(len(columns))}
+    df = pd.DataFrame(data, copy=False)
+    df.columns = columns
+    return df
+
+
+def parse_file(file, options=None, on_progress=None, on_chunk=None):
+    options = options or {}
+    file.seek(0)
+    if compression_of(file.name):
+        member = options.get("member")
+        if member is None and compression_of(file.name) == 'zip':
+            member = next(iter(list_members(file)), None)
+        name = member or inner_name(file.name)
+        stream = open_stream(file, member)
+    else:
+        name, stream = file.name, file
+    reopen = (lambda: open_stream(file, member)) if stream is not file else None
+
+    try:
+        if name.endswith('csv'):
+            return read_delimited(stream, on_progress=on_progress, on_chunk=on_chunk, source=file, reopen=reopen)
+        elif name.endswith('txt') or name.endswith('tsv'):
+            return read_delimited(stream, sep="\t", on_progress=on_progress, on_chunk=on_chunk, source=file,
+                                  reopen=reopen)
+        elif name.endswith('xlsx') and stream is file:
+            return read_sheet(_file_bytes(file), options.get("sheet"))
+    finally:
+        if stream is not file:
+            stream.close()
+    raise ValueError("Unsupported File Format!")
+
+
+def archive_members(file):
+    if compression_of(file.name) != 'zip':
+        return []
+    return list_members(file)
+
+
+def _finish(key, df):
+    _dtype_reports[key] = optimize_dtypes(df)
+    if len(_dtype_reports) > _MAX_REPORTS:
+        _dtype_reports.popitem(last=False)
+    column_store.save(key, df)
+    dataset_cache.put(key, df)
+
+
+def load_dataset(file, options=None, on_progress=None, on_chunk=None):
+    key = dataset_key(file, options)
+    df = dataset_cache.get(key)
+    if df is None and column_store.has(key):
+        try:
+            df = column_store.load(key)
+            dataset_cache.put(key, df)
+        except FileNotFoundError:
+            df = None  # Pruned from the store by another session in the meantime
+    if df is None:
+        df = parse_file(file, options, on_progress=on_progress, on_chunk=on_chunk)
+        _finish(key, df)
+    return df
+
+
+def load_sheets(file, sheets, max_workers=None):
+    # Parses every selected sheet that isn't cached or stored yet, in parallel processes
+    missing = [sheet for sheet in sheets
+               if dataset_key(file, {"sheet": sheet}) not in dataset_cache
+               and not column_store.has(dataset_key(file, {"sheet": sheet}))]
+    if missing:
+        for sheet, df in read_sheets(_file_bytes(file), missing, max_workers=max_workers).items():
+            _finish(dataset_key(file, {"sheet": sheet}), df)
+    return {sheet: load_dataset(file, {"sheet": sheet}) for sheet in sheets}
+
+
+def dtype_report(file, options=None):
+    return _dtype_reports.get(dataset_key(file, options))
@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+
+from utils.cleaning import Change, OPERATIONS, apply_change, apply_step, plan_step
+from utils.history import CompositeDelta
+
+# Steps that rewrite one column from its own values, element by element
+COLUMN_OPS = {"strip", "replace", "change_type"}
+# Steps that remove rows using a per-row predicate on one column
+FILTER_OPS = {"drop_rows"}
+ALL = "*"
+# Nothing is moved across these: they change the index or depend on every column of every row
+BARRIERS = {"set_index", "reset_index", "fillna", "drop_duplicates"}
+
+
+class PipelineError(ValueError):
+    # frame is the input rolled back to its state before the pipeline ran, when a history was given
+    def __init__(self, message, frame=None):
+        super().__init__(message)
+        self.frame = frame
+
+
+def _reads(step):
+    op, args = step["op"], step.get("args", {})
+    if op in COLUMN_OPS or op in FILTER_OPS or op in ("sort", "set_index"):
+        return {args.get("column")}
+    if op == "drop_columns":
+        return set()
+    return ALL  # fillna, dropna, drop_duplicates, reset_index look at every column
+
+
+def _writes(step):
+    op, args = step["op"], step.get("args", {})
+    if op in COLUMN_OPS:
+        return {args.get("column")}
+    if op == "drop_columns":
+        return set(args.get("columns", []))
+    if op in FILTER_OPS or op in ("sort", "dropna", "drop_duplicates"):
+        return set()
+    return ALL  # fillna, set_index, reset_index
+
+
+def _touches(columns, names):
+    return columns == ALL or bool(columns & names)
+
+
+def _eliminate_dead_steps(steps, notes):
+    # A column op whose column is dropped before anything reads it again never needs to run
+    keep = [True] * len(steps)
+    for j, (_, step) in enumerate(steps):
+        if step["op"] != "drop_columns":
+            continue
+        dropped = set(step["args"].get("columns", []))
+        for i in range(j - 1, -1, -1):
+            if not keep[i]:
+                continue
+            number, earlier = steps[i]
+            if earlier["op"] in COLUMN_OPS and earlier["args"].get("column") in dropped:
+                keep[i] = False
+                notes.append(f"step {number} ({earlier['op']} on '{earlier['args'].get('column')}') skipped: column is dropped later")
+            elif _touches(_reads(earlier), dropped) or _writes(earlier) == ALL:
+                break
+    return [entry for entry, kept in zip(steps, keep) if kept]
+
+
+def _can_pass(moving, step):
+    # Whether `moving` may run before `step` without changing the result
+    if step["op"] in BARRIERS:
+        return False
+    if moving["op"] == "drop_columns":
+        dropped = set(moving["args"].get("columns", []))
+        return not _touches(_reads(step), dropped) and not _touches(_writes(step), dropped)
+    return not _touches(_writes(step), _reads(moving))
+
+
+def _hoist(steps, ops, notes, reason):
+    # Moves each matching step as early as the steps before it allow, keeping their relative order
+    result = []
+    for entry in steps:
+        number, step = entry
+        if step["op"] not in ops:
+            result.append(entry)
+            continue
+        position = len(result)
+        while position > 0 and result[position - 1][1]["op"] not in ops and _can_pass(step, result[position - 1][1]):
+            position -= 1
+        if position < len(result):
+            notes.append(f"step {number} ({step['op']}) moved before step {result[position][0]}: {reason}")
+        result.insert(position, entry)
+    return result
+
+
+class Stage:
+    def __init__(self, kind, steps, column=None):
+        self.kind = kind  # "filter", "column" or "step"
+        self.steps = steps  # [(original step number, step)]
+        self.column = column
+
+    def describe(self):
+        numbers = ", ".join(str(number) for number, _ in self.steps)
+        if self.kind == "filter":
+            conditions = " OR ".join(f"{s['args'].get('column')} {s['args'].get('operator')} {s['args'].get('value', '')}".strip()
+                                     for _, s in self.steps)
+            return f"FILTER one pass, drop rows where {conditions}  [steps {numbers}]"
+        if self.kind == "column":
+            chain = " -> ".join(_step_label(s, with_column=False) for _, s in self.steps)
+            return f"COLUMN '{self.column}' fused over unique values: {chain}  [steps {numbers}]"
+        return f"{_step_label(self.steps[0][1])}  [step {numbers}]"
+
+
+def _step_label(step, with_column=True):
+    args = step.get("args", {})
+    detail = ", ".join(f"{k}={v!r}" for k, v in args.items() if with_column or k != "column")
+    return f"{step['op']}({detail})" if detail else step["op"]
+
+
+class LazyPipeline:
+    # Queued cleaning steps that are reordered, fused and then run together
+    def __init__(self, steps=None):
+        self.steps = [dict(step) for step in steps or []]
+
+    def __len__(self):
+        return len(self.steps)
+
+    def add(self, op, **args):
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown cleaning step '{op}'.")
+        self.steps.append({"op": op, "args": args})
+
+    def optimize(self):
+        notes = []
+        steps = list(enumerate(self.steps, start=1))
+        steps = _eliminate_dead_steps(steps, notes)
+        steps = _hoist(steps, {"drop_columns"}, notes, "unused columns are dropped early")
+        steps = _hoist(steps, FILTER_OPS, notes, "rows are filtered before columns are transformed")
+
+        stages = []
+        i = 0
+        while i < len(steps):
+            op = steps[i][1]["op"]
+            if op in FILTER_OPS or op in COLUMN_OPS:
+                # A run of filters becomes one mask pass; a run of column ops is grouped per column
+                ops = FILTER_OPS if op in FILTER_OPS else COLUMN_OPS
+                j = i
+                while j < len(steps) and steps[j][1]["op"] in ops:
+                    j += 1
+                run = steps[i:j]
+                if ops is FILTER_OPS:
+                    stages.append(Stage("filter", run))
+                else:
+                    by_column = {}
+                    for entry in run:
+                        by_column.setdefault(entry[1]["args"].get("column"), []).append(entry)
+                    stages.extend(Stage("column", group, column) for column, group in by_column.items())
+                i = j
+            else:
+                stages.append(Stage("step", [steps[i]]))
+                i += 1
+        return stages, notes
+
+    def explain(self):
+        stages, notes = self.optimize()
+        lines = [f"{len(self.steps)} queued steps -> {len(stages)} passes over the data"]
+        lines += [f"{i}. {stage.describe()}" for i, stage in enumerate(stages, start=1)]
+        if notes:
+            lines.append("")
+            lines += [f"- {note}" for note in notes]
+        return "\n".join(lines)
+
+    def execute(self, df, history=None):
+        stages, _ = self.optimize()
+        if history is None:
+            for stage in stages:
+                df = _run_stage(df, stage, None)
+            return df
+        current = df
+        try:
+            with history.grouped() as entries:
+                for stage in stages:
+                    current = _run_stage(current, stage, history)
+        except ValueError as e:
+            # Undo the stages that already ran so the caller gets the frame back as it was
+            restored, _ = CompositeDelta(entries).apply(current)
+            raise PipelineError(str(e), restored)
+        return current
+
+
+def _run_stage(df, stage, history):
+    try:
+        if stage.kind == "filter":
+            matches = np.zeros(len(df), dtype=bool)
+            for _, step in stage.steps:
+                matches[plan_step(df, step).drop_rows] = True
+            return apply_change(df, Change(drop_rows=np.flatnonzero(matches)), history)
+        if stage.kind == "column":
+            return apply_change(df, Change(columns={stage.column: _fused_column(df, stage)}), history)
+        df, _ = apply_step(df, stage.steps[0][1], history)
+        return df
+    except ValueError as e:
+        numbers = ", ".join(str(number) for number, _ in stage.steps)
+        raise ValueError(f"Step {numbers} failed: {e}" if len(stage.steps) == 1 else f"Steps {numbers} failed: {e}")
+
+
+def _fused_column(df, stage):
+    # The chain runs once over the distinct values, then one take expands it back to every row
+    if stage.column not in df.columns:
+        raise ValueError(f"Column '{stage.column}' does not exist.")
+    values = df[stage.column]
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    distinct = pd.DataFrame({stage.column: pd.Series(uniques)})
+    for _, step in stage.steps:
+        distinct, _ = apply_step(distinct, step)
+    result = distinct[stage.column].take(codes)
+    result.index = df.index
+    return result
@@ -0,0 +1,96 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+PAGE_SIZES = [25, 50, 100, 250, 500]
+
+
+def sort_positions(df, column, ascending=True):
+    # Stable order of row positions; missing values always go last
+    values = df[column].reset_index(drop=True)
+    return values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+
+
+def search_mask(df, query, column=None):
+    # Case-insensitive substring match over one column or all of them
+    columns = [column] if column is not None else list(df.columns)
+    mask = np.zeros(len(df), dtype=bool)
+    for name in columns:
+        values = df[name]
+        if isinstance(values, pd.DataFrame):  # duplicated column names
+            values = values.iloc[:, 0]
+        # Categoricals are searched through their categories, so each distinct value is checked once
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            hits = pd.Series(values.cat.categories).astype(str).str.contains(query, case=False, regex=False).to_numpy()
+            codes = values.cat.codes.to_numpy()
+            mask |= (codes >= 0) & hits[codes.clip(0)] if len(hits) else False
+        else:
+            found = values.astype(str).str.contains(query, case=False, regex=False, na=False).to_numpy(dtype=bool)
+            mask |= found & values.notna().to_numpy()
+    return mask
+
+
+def _to_arrow(frame):
+    # Converting once here means reruns only re-send the cached table; mixed-type
+    # object columns can't be converted and are left for Streamlit to handle
+    try:
+        return pa.Table.from_pandas(frame, preserve_index=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError, ValueError):
+        return frame
+
+
+class PreviewCache:
+    # Sort orders, search results and page slices for one version of the dataset
+    def __init__(self, max_pages=64, max_views=16):
+        self.max_pages = max_pages
+        self.max_views = max_views
+        self.identity = None
+        self._views = OrderedDict()
+        self._pages = OrderedDict()
+
+    def _check(self, identity):
+        if identity != self.identity:
+            self.identity = identity
+            self._views.clear()
+            self._pages.clear()
+
+    def _remember(self, store, key, value, limit):
+        store[key] = value
+        if len(store) > limit:
+            store.popitem(last=False)
+        return value
+
+    def view(self, identity, df, sort=None, ascending=True, query="", column=None):
+        # Row positions shown, in display order; None means every row in frame order
+        self._check(identity)
+        spec = (sort, ascending, query, column)
+        if spec in self._views:
+            self._views.move_to_end(spec)
+            return self._views[spec]
+        positions = None
+        if sort is not None:
+            positions = sort_positions(df, sort, ascending)
+        if query:
+            mask = search_mask(df, query, column)
+            positions = np.flatnonzero(mask) if positions is None else positions[mask[positions]]
+        return self._remember(self._views, spec, positions, self.max_views)
+
+    def rows(self, identity, df, spec):
+        positions = self.view(identity, df, *spec)
+        return len(df) if positions is None else len(positions)
+
+    def page(self, identity, df, spec, number, size):
+        # Only the rows of one page are sliced out of the frame and converted
+        positions = self.view(identity, df, *spec)
+        key = (spec, number, size)
+        if key in self._pages:
+            self._pages.move_to_end(key)
+            return self._pages[key]
+        start = number * size
+        if positions is None:
+            frame = df.iloc[start:start + size]
+        else:
+            frame = df.iloc[positions[start:start + size]]
+        return self._remember(self._pages, key, _to_arrow(frame), self.max_pages)
@@ -0,0 +1,112 @@
+import json
+import re
+from pathlib import Path
+
+from utils.cleaning import OPERATIONS, apply_step
+from utils.pipeline import LazyPipeline
+
+RECIPE_VERSION = 1
+# A "pipeline" step holds queued steps that were optimized and run together
+PIPELINE = "pipeline"
+STEP_OPS = [*OPERATIONS, PIPELINE]
+
+
+def _validate(steps, where=""):
+    for i, step in enumerate(steps, start=1):
+        if not isinstance(step, dict) or step.get("op") not in STEP_OPS:
+            raise ValueError(f"Step {where}{i} is not a known cleaning step.")
+        if not isinstance(step.get("args", {}), dict):
+            raise ValueError(f"Step {where}{i} arguments must be an object.")
+        if step["op"] == PIPELINE:
+            nested = step.get("args", {}).get("steps")
+            if not isinstance(nested, list) or any(s.get("op") == PIPELINE for s in nested if isinstance(s, dict)):
+                raise ValueError(f"Step {where}{i} must hold a list of plain cleaning steps.")
+            _validate(nested, where=f"{where}{i}.")
+
+
+class Recipe:
+    # An ordered list of cleaning steps, each {"op": name, "args": {...}}, that can be saved and replayed
+    def __init__(self, steps=None, name=""):
+        self.steps = [dict(step) for step in steps or []]
+        self.name = name
+
+    def __len__(self):
+        return len(self.steps)
+
+    def add(self, op, **args):
+        if op not in STEP_OPS:
+            raise ValueError(f"Unknown cleaning step '{op}'.")
+        self.steps.append({"op": op, "args": args})
+
+    def pop(self):
+        return self.steps.pop() if self.steps else None
+
+    def clear(self):
+        self.steps = []
+
+    def to_dict(self):
+        return {"version": RECIPE_VERSION, "name": self.name, "steps": self.steps}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=4)
+
+    @classmethod
+    def from_dict(cls, data):
+        steps = data.get("steps", [])
+        if not isinstance(steps, list):
+            raise ValueError("Invalid recipe file: 'steps' must be a list.")
+        _validate(steps)
+        return cls(steps, data.get("name", ""))
+
+    @classmethod
+    def from_json(cls, text):
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid recipe file: {e}")
+        if not isinstance(data, dict):
+            raise ValueError("Invalid recipe file: expected an object with a 'steps' list.")
+        return cls.from_dict(data)
+
+    def replay(self, df, history=None):
+        # Runs every step in one pass; a failing step stops the replay and names the step
+        for i, step in enumerate(self.steps, start=1):
+            try:
+                if step["op"] == PIPELINE:
+                    df = LazyPipeline(step["args"]["steps"]).execute(df, history)
+                else:
+                    df, _ = apply_step(df, step, history)
+            except ValueError as e:
+                raise ValueError(f"Step {i} ({step['op']}) failed: {e}")
+        return df
+
+
+class RecipeStore:
+    def __init__(self, root=Path("data/recipes")):
+        self.root = Path(root)
+
+    def path(self, name):
+        slug = re.sub(r"[^\w\-]+", "_", name.strip()) or "recipe"
+        return self.root / f"{slug}.json"
+
+    def names(self):
+        if not self.root.exists():
+            return []
+        return sorted(path.stem for path in self.root.glob("*.json"))
+
+    def save(self, recipe):
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(recipe.name)
+        with open(path, 'w') as f:
+            f.write(recipe.to_json())
+        return path
+
+    def load(self, name):
+        with open(self.path(name), 'r') as f:
+            return Recipe.from_json(f.read())
+
+    def delete(self, name):
+        self.path(name).unlink(missing_ok=True)
+
+
+recipe_store = RecipeStore()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+
+OPERATORS = [
+    "equals", "not equals",
+    "greater than", "greater or equal", "less than", "less or equal",
+    "between", "in list", "matches regex", "is null", "is not null",
+]
+NO_VALUE = {"is null", "is not null"}
+TRUE_WORDS = {"true", "1", "yes", "y", "t"}
+FALSE_WORDS = {"false", "0", "no", "n", "f"}
+
+
+def _comparable(series):
+    # Unordered categoricals can't be compared with < or >, so compare their underlying values
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(series.cat.categories.dtype)
+    return series
+
+
+def coerce_value(series, text):
+    # Turns the text typed in the UI into a value of the column's own type
+    text = text.strip()
+    target = _comparable(series)
+    if ptypes.is_bool_dtype(target):
+        word = text.lower()
+        if word in TRUE_WORDS:
+            return True
+        if word in FALSE_WORDS:
+            return False
+        raise ValueError(f"'{text}' is not a boolean value")
+    if ptypes.is_numeric_dtype(target):
+        try:
+            return pd.to_numeric(text)
+        except (ValueError, TypeError):
+            raise ValueError(f"'{text}' is not a number")
+    if ptypes.is_datetime64_any_dtype(target):
+        value = pd.to_datetime(text, errors='coerce')
+        if pd.isna(value):
+            raise ValueError(f"'{text}' is not a date")
+        tz = getattr(target.dtype, "tz", None)
+        if tz is not None and value.tzinfo is None:
+            value = value.tz_localize(tz)
+        return value
+    return text
+
+
+def build_mask(series, operator, value="", upper=""):
+    if operator == "is null":
+        mask = series.isna()
+    elif operator == "is not null":
+        mask = series.notna()
+    elif operator == "matches regex":
+        mask = series.astype(str).str.contains(value, regex=True, na=False).where(series.notna(), False)
+    elif operator == "in list":
+        values = [coerce_value(series, item) for item in value.split(",") if item.strip()]
+        mask = _comparable(series).isin(values)
+    elif operator == "between":
+        mask = _comparable(series).between(coerce_value(series, value), coerce_value(series, upper))
+    else:
+        target = coerce_value(series, value)
+        column = _comparable(series)
+        if operator == "equals":
+            mask = column == target
+        elif operator == "not equals":
+            mask = (column != target) & column.notna()
+        elif operator == "greater than":
+            mask = column > target
+        elif operator == "greater or equal":
+            mask = column >= target
+        elif operator == "less than":
+            mask = column < target
+        elif operator == "less or equal":
+            mask = column <= target
+        else:
+            raise ValueError(f"Unknown operator: {operator}")
+    return np.asarray(mask.to_numpy(dtype=bool, na_value=False))
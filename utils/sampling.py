@@ -0,0 +1,82 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+METHODS = ["Reservoir", "Stratified", "Systematic"]
+
+
+def reservoir_positions(n_rows, k, seed=0, chunk_rows=1_000_000):
+    # Streaming reservoir via random priority keys: keep the k smallest keys seen so far,
+    # so state stays O(k) however many rows go past
+    rng = np.random.default_rng(seed)
+    if k >= n_rows:
+        return np.arange(n_rows)
+    keep_keys = np.empty(0)
+    keep_pos = np.empty(0, dtype=np.int64)
+    for start in range(0, n_rows, chunk_rows):
+        stop = min(start + chunk_rows, n_rows)
+        keys = np.concatenate([keep_keys, rng.random(stop - start)])
+        pos = np.concatenate([keep_pos, np.arange(start, stop)])
+        if len(keys) > k:
+            best = np.argpartition(keys, k - 1)[:k]
+            keys, pos = keys[best], pos[best]
+        keep_keys, keep_pos = keys, pos
+    return np.sort(keep_pos)
+
+
+def systematic_positions(n_rows, k, seed=0):
+    if k >= n_rows:
+        return np.arange(n_rows)
+    rng = np.random.default_rng(seed)
+    step = n_rows / k
+    start = rng.uniform(0, step)
+    return (start + step * np.arange(k)).astype(np.int64)
+
+
+def stratified_positions(column, k, seed=0):
+    # Proportional allocation per stratum, at least one row from every non-empty stratum
+    n_rows = len(column)
+    if k >= n_rows:
+        return np.arange(n_rows)
+    rng = np.random.default_rng(seed)
+    codes, uniques = pd.factorize(column, use_na_sentinel=False)
+    sizes = np.bincount(codes, minlength=len(uniques))
+    alloc = np.maximum(np.round(sizes * k / n_rows), 1).astype(np.int64)
+    order = np.lexsort((rng.random(n_rows), codes))
+    sorted_codes = codes[order]
+    group_start = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    rank_in_group = np.arange(n_rows) - group_start[sorted_codes]
+    return np.sort(order[rank_in_group < alloc[sorted_codes]])
+
+
+def sample_positions(df, method, k, column=None, seed=0):
+    if method == "Reservoir":
+        return reservoir_positions(len(df), k, seed)
+    if method == "Systematic":
+        return systematic_positions(len(df), k, seed)
+    if method == "Stratified":
+        if column is None:
+            raise ValueError("Stratified sampling needs a column to stratify by.")
+        return stratified_positions(df[column], k, seed)
+    raise ValueError(f"Unknown sampling method: {method}")
+
+
+class SampleCache:
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self.identity = None
+        self._entries = OrderedDict()
+
+    def positions(self, identity, df, method, k, column=None, seed=0):
+        # Samples only stay valid for one version of the dataset
+        if identity != self.identity:
+            self.identity = identity
+            self._entries.clear()
+        spec = (method, k, column, seed)
+        if spec not in self._entries:
+            self._entries[spec] = sample_positions(df, method, k, column, seed)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(spec)
+        return self._entries[spec]
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+from scipy import stats
+
+
+METHODS = ["pearson", "spearman", "kendall"]
+
+
+def _floats(values):
+    # float64 array with NaN for every kind of missing value (None, pd.NA, NaT)
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if len(values) and not ptypes.is_numeric_dtype(values):
+        raise ValueError(f"Column '{values.name}' is not numeric." if values.name is not None else "Values are not numeric.")
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _pair(x, y):
+    # Pairwise-complete rows: only rows where both values are present count
+    x, y = _floats(x), _floats(y)
+    if len(x) != len(y):
+        raise ValueError("Both columns must have the same length.")
+    keep = ~(np.isnan(x) | np.isnan(y))
+    return x[keep], y[keep]
+
+
+def _centered(x):
+    # Two-pass centering; the second pass removes the rounding error left in the first mean
+    center = x.mean()
+    dx = x - center
+    return dx - dx.mean()
+
+
+def mean(values):
+    x = _floats(values)
+    x = x[~np.isnan(x)]
+    if not len(x):
+        return np.nan
+    center = x.mean()
+    return center + (x - center).mean()
+
+
+def covariance(x, y):
+    x, y = _pair(x, y)
+    if len(x) < 2:
+        return np.nan
+    return float(np.dot(_centered(x), _centered(y)) / (len(x) - 1))
+
+
+def _pearson(x, y):
+    if len(x) < 2:
+        return np.nan
+    dx, dy = _centered(x), _centered(y)
+    denominator = np.sqrt(np.dot(dx, dx) * np.dot(dy, dy))
+    return float(np.clip(np.dot(dx, dy) / denominator, -1, 1)) if denominator > 0 else np.nan
+
+
+def correlation(x, y, method="pearson"):
+    if method not in METHODS:
+        raise ValueError(f"Method must be one of: {', '.join(METHODS)}.")
+    x, y = _pair(x, y)
+    if method == "kendall":
+        return float(stats.kendalltau(x, y).statistic) if len(x) >= 2 else np.nan
+    if method == "spearman":
+        x, y = stats.rankdata(x), stats.rankdata(y)
+    return _pearson(x, y)
+
+
+def numeric_columns(df):
+    return [i for i in range(df.shape[1])
+            if ptypes.is_numeric_dtype(df.iloc[:, i]) and not ptypes.is_bool_dtype(df.iloc[:, i])]
+
+
+def _matrix(df):
+    positions = numeric_columns(df)
+    labels = [df.columns[i] for i in positions]
+    if not positions:
+        raise ValueError("There are no numeric columns.")
+    values = np.empty((len(df), len(positions)))
+    for k, i in enumerate(positions):
+        values[:, k] = _floats(df.iloc[:, i])
+    return labels, values
+
+
+def _pairwise_moments(values):
+    # Counts, centered cross products and per-pair sums of squares for every pair of columns,
+    # all from a few matrix products. Columns are shifted by their own mean first so the
+    # sum-of-products formula stays accurate
+    present = ~np.isnan(values)
+    k = values.shape[1]
+    if present.all():
+        shifted = values - values.mean(axis=0)
+        products = shifted.T @ shifted
+        n = np.full((k, k), float(len(values)))
+        sums = np.broadcast_to(shifted.sum(axis=0), (k, k)).T
+        squares = np.broadcast_to(np.diag(products), (k, k)).T
+    else:
+        counts = np.count_nonzero(present, axis=0)
+        shifted = np.where(present, values, 0.0)
+        shifted -= np.divide(shifted.sum(axis=0), counts, out=np.zeros(k), where=counts > 0)
+        shifted[~present] = 0.0
+        products = shifted.T @ shifted
+        mask = present.astype(np.float64)
+        n = mask.T @ mask
+        sums = shifted.T @ mask  # sums[i, j]: column i over rows where j is present too
+        squares = (shifted * shifted).T @ mask
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cross = products - sums * sums.T / n
+        own = squares - sums ** 2 / n
+    return n, cross, own
+
+
+def covariance_matrix(df):
+    # Pairwise-complete sample covariance of every numeric column against every other
+    labels, values = _matrix(df)
+    n, cross, _ = _pairwise_moments(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        matrix = np.where(n >= 2, cross / (n - 1), np.nan)
+    return pd.DataFrame(matrix, index=labels, columns=labels)
+
+
+def _pearson_matrix(values):
+    n, cross, own = _pairwise_moments(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        matrix = cross / np.sqrt(own * own.T)
+    matrix = np.where((n >= 2) & (own > 0) & (own.T > 0), np.clip(matrix, -1, 1), np.nan)
+    return n, matrix
+
+
+def correlation_matrix(df, method="pearson"):
+    # All numeric columns in one call. Pearson is a few matrix products; Spearman ranks each column
+    # once and re-ranks only pairs whose missing values differ; Kendall is computed pair by pair
+    if method not in METHODS:
+        raise ValueError(f"Method must be one of: {', '.join(METHODS)}.")
+    labels, values = _matrix(df)
+    k = values.shape[1]
+    if method == "kendall":
+        matrix = np.full((k, k), np.nan)
+        for i in range(k):
+            for j in range(i, k):
+                matrix[i, j] = matrix[j, i] = correlation(values[:, i], values[:, j], "kendall")
+    elif method == "spearman":
+        ranks = pd.DataFrame(values).rank().to_numpy(dtype=np.float64)
+        n, matrix = _pearson_matrix(ranks)
+        counts = np.diag(n)
+        # Ranks are only valid for a pair when neither column loses rows to the other's gaps
+        for i, j in zip(*np.nonzero(np.triu((n < counts[:, None]) | (n < counts[None, :]), 1))):
+            matrix[i, j] = matrix[j, i] = correlation(values[:, i], values[:, j], "spearman")
+    else:
+        _, matrix = _pearson_matrix(values)
+    return pd.DataFrame(matrix, index=labels, columns=labels)
+
+
+def confidence_interval(values, confidence=0.95):
+    # Student-t interval for the mean; returns (mean, standard error, (low, high))
+    data = pd.Series(values).dropna()
+    center = data.mean()
+    sem = stats.sem(data)
+    return center, sem, stats.t.interval(confidence, len(data) - 1, loc=center, scale=sem)
+
+
+def summary(df):
+    # One row per column: counts for every column, moments and range for numeric ones
+    rows = []
+    for i, column in enumerate(df.columns):
+        values = df.iloc[:, i]
+        row = {
+            "column": column,
+            "dtype": str(values.dtype),
+            "count": int(values.count()),
+            "nulls": int(values.isna().sum()),
+            "unique": int(values.nunique()),
+        }
+        if ptypes.is_numeric_dtype(values) and not ptypes.is_bool_dtype(values):
+            row.update(sum=values.sum(), mean=values.mean(), std=values.std(), min=values.min(), max=values.max())
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["column", "dtype", "count", "nulls", "unique", "sum", "mean", "std", "min", "max"])
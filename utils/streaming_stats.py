@@ -0,0 +1,314 @@
+# Describe-style statistics for files too large to load, computed chunk by chunk in one pass.
+# Each worker summarizes its own byte range of the file and the partial results are merged.
+# Run from the repository root:
+#   python -m utils.streaming_stats FILE [--workers N] [--chunk-rows N] [--output stats.csv]
+import argparse
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+
+from utils.archive_reader import compression_of, inner_name
+
+CHUNK_ROWS = 100_000
+SKETCH_SIZE = 256  # items kept per sketch level; rank error is roughly 1 / SKETCH_SIZE
+QUANTILES = [0.25, 0.5, 0.75]
+# Parallel reads need at least this much file per worker to be worth the start-up
+MIN_RANGE_BYTES = 64 * 1024**2
+# The only directory the app may summarize files from; the CLI takes any path
+DATA_DIR = Path(os.getenv('LARGE_FILE_DIR', 'data/large'))
+
+
+class QuantileSketch:
+    # KLL-style compactor sketch: level h holds items that each stand for 2**h values. When a level
+    # fills up it is sorted and every other item moves up a level, so memory stays
+    # O(size * log(n / size)) and two sketches merge by joining their levels
+    def __init__(self, size=SKETCH_SIZE):
+        self.size = size
+        self.levels = []
+        self._compactions = 0
+
+    def update(self, values):
+        if len(values):
+            self._add(0, np.asarray(values, dtype=np.float64))
+            self._compact()
+
+    def merge(self, other):
+        for h, items in enumerate(other.levels):
+            if len(items):
+                self._add(h, items)
+        self._compact()
+        return self
+
+    def _add(self, h, items):
+        while len(self.levels) <= h:
+            self.levels.append(np.empty(0))
+        self.levels[h] = np.concatenate([self.levels[h], items])
+
+    def _compact(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self.size:
+                items = np.sort(items)
+                # An odd item out stays behind; alternating the kept half keeps the estimate unbiased
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                self._compactions += 1
+                self.levels[h] = keep
+                self._add(h + 1, paired[self._compactions % 2::2])
+            h += 1
+
+    @property
+    def count(self):
+        return sum(len(items) << h for h, items in enumerate(self.levels))
+
+    def quantiles(self, qs):
+        if not self.levels or not self.count:
+            return [np.nan] * len(qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, cumulative = items[order], np.cumsum(weights[order])
+        ranks = np.asarray(qs) * cumulative[-1]
+        return list(items[np.minimum(np.searchsorted(cumulative, ranks, side='left'), len(items) - 1)])
+
+
+class ColumnStats:
+    # Running count, nulls, sum, mean, variance (Welford/Chan), range and quantile sketch for one column.
+    # A column that reads as text in any chunk keeps only its counts
+    def __init__(self, name):
+        self.name = name
+        self.kind = None  # "numeric" or "text" once a non-empty chunk has been seen
+        self.count = 0
+        self.nulls = 0
+        self.total = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.sketch = QuantileSketch()
+
+    def update(self, values):
+        present = values.notna()
+        n = int(present.sum())
+        self.nulls += len(values) - n
+        if not n:
+            return
+        numeric = ptypes.is_numeric_dtype(values) and not ptypes.is_bool_dtype(values)
+        if not numeric:
+            self._to_text()
+            self.count += n
+            return
+        if self.kind == "text":
+            self.count += n
+            return
+        self.kind = "numeric"
+        x = values.to_numpy(dtype=np.float64, na_value=np.nan)[present.to_numpy()]
+        center = x.mean()
+        center += (x - center).mean()
+        total = int(values.sum()) if ptypes.is_integer_dtype(values) else float(x.sum())
+        self._combine(n, total, center, float(((x - center) ** 2).sum()), x.min(), x.max())
+        self.sketch.update(x)
+
+    def _to_text(self):
+        self.kind = "text"
+        self.total, self.mean, self.m2, self.min, self.max = 0, 0.0, 0.0, np.nan, np.nan
+        self.sketch = QuantileSketch()
+
+    def _combine(self, n, total, mean, m2, low, high):
+        # Chan et al. pairwise update: exact for any split of the rows, so chunk order doesn't matter
+        combined = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / combined
+        self.m2 += m2 + delta * delta * self.count * n / combined
+        self.count = combined
+        self.total += total
+        self.min = low if np.isnan(self.min) else min(self.min, low)
+        self.max = high if np.isnan(self.max) else max(self.max, high)
+
+    def merge(self, other):
+        self.nulls += other.nulls
+        if other.kind is None:
+            return self
+        if other.kind == "text" or self.kind == "text":
+            self._to_text()
+            self.count += other.count
+            return self
+        self.kind = "numeric"
+        self._combine(other.count, other.total, other.mean, other.m2, other.min, other.max)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def result(self, quantiles=QUANTILES):
+        row = {"column": self.name, "kind": self.kind or "empty", "count": self.count, "nulls": self.nulls}
+        if self.kind == "numeric":
+            row.update(sum=self.total, mean=self.mean,
+                       std=np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan,
+                       min=self.min, max=self.max)
+            row.update({f"{q:.0%}": v for q, v in zip(quantiles, self.sketch.quantiles(quantiles))})
+        return row
+
+
+class StreamSummary:
+    # Mergeable summary of a whole table; feed it chunks in any order, or merge summaries of parts
+    def __init__(self):
+        self.columns = {}
+        self.rows = 0
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for i, name in enumerate(chunk.columns):
+            self.columns.setdefault(name, ColumnStats(name)).update(chunk.iloc[:, i])
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for name, stats in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(stats)
+            else:
+                self.columns[name] = stats
+        return self
+
+    def to_frame(self, quantiles=QUANTILES):
+        labels = [f"{q:.0%}" for q in quantiles]
+        columns = ["column", "kind", "count", "nulls", "sum", "mean", "std", "min", *labels, "max"]
+        return pd.DataFrame([stats.result(quantiles) for stats in self.columns.values()], columns=columns)
+
+
+class _RangeReader(io.RawIOBase):
+    # A read-only view of bytes [start, end) of a file, so read_csv stops at the end of its range
+    def __init__(self, path, start, end):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._left = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._left)
+        if size <= 0:
+            return 0
+        n = self._file.readinto(memoryview(buffer)[:size])
+        self._left -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def _separator(path):
+    # Same rule as the upload page: .txt and .tsv are tab separated, looking through .gz and the like
+    return "\t" if inner_name(Path(path).name).lower().endswith(('txt', 'tsv')) else ","
+
+
+def _header(path, sep):
+    # Column names and where the first data row starts
+    with open(path, 'rb') as f:
+        line = f.readline()
+        names = pd.read_csv(io.BytesIO(line), sep=sep, nrows=0).columns.tolist()
+        return names, f.tell()
+
+
+def byte_ranges(path, parts):
+    # Splits the data rows into about equal byte ranges, each starting at the beginning of a line.
+    # Assumes no quoted field spans several lines; use one worker for files where one does
+    _, start = _header(path, _separator(path))
+    size = os.path.getsize(path)
+    bounds = [start]
+    with open(path, 'rb') as f:
+        for i in range(1, parts):
+            f.seek(max(start + (size - start) * i // parts, bounds[-1]))
+            f.readline()
+            if f.tell() >= size:
+                break
+            if f.tell() > bounds[-1]:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def summarize_range(path, start, end, chunk_rows=CHUNK_ROWS):
+    # Runs in a worker process and returns the partial summary for its range
+    sep = _separator(path)
+    names, _ = _header(path, sep)
+    summary = StreamSummary()
+    with io.BufferedReader(_RangeReader(path, start, end)) as raw:
+        with pd.read_csv(raw, sep=sep, header=None, names=names, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                summary.update(chunk)
+    return summary
+
+
+def data_file(name, root=DATA_DIR):
+    # Resolves a path typed into the app against root, rejecting anything outside it
+    # (absolute paths, '..', symlinks out of the directory)
+    root = root.resolve()
+    path = (root / name).resolve()
+    if not path.is_relative_to(root):
+        raise ValueError(f"Only files inside {root} can be summarized.")
+    if not path.is_file():
+        raise ValueError(f"{name} is not a file in {root}.")
+    return path
+
+
+def summarize_file(path, workers=None, chunk_rows=CHUNK_ROWS, on_progress=None):
+    # Compressed files can't be split by byte offset, so they are read by a single process
+    path = Path(path)
+    size = path.stat().st_size
+    workers = workers or os.cpu_count() or 1
+    parts = min(workers, max(size // MIN_RANGE_BYTES, 1))
+    if compression_of(path.name) is not None or parts <= 1:
+        summary = StreamSummary()
+        with pd.read_csv(path, sep=_separator(path), chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                summary.update(chunk)
+                if on_progress is not None:
+                    on_progress(summary.rows)
+        return summary
+    ranges = byte_ranges(path, parts)
+    summary = StreamSummary()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(summarize_range, path, start, end, chunk_rows) for start, end in ranges]
+        # Merged in file order so the column order follows the file
+        for future in futures:
+            summary.merge(future.result())
+            if on_progress is not None:
+                on_progress(summary.rows)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a large CSV/TSV file without loading it.")
+    parser.add_argument("file", type=Path)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--output", type=Path, default=None, help="write the summary to this CSV file")
+    args = parser.parse_args(argv)
+    if not args.file.is_file():
+        print(f"{args.file} is not a file", file=sys.stderr)
+        return 2
+    try:
+        summary = summarize_file(args.file, args.workers, args.chunk_rows)
+    except (OSError, ValueError) as e:
+        print(f"Could not summarize {args.file}: {e}", file=sys.stderr)
+        return 1
+    table = summary.to_frame()
+    if args.output is not None:
+        table.to_csv(args.output, index=False)
+    else:
+        print(f"{summary.rows:,} rows")
+        print(table.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import io
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+MAX_SPAN = 1000
+
+
+def _span(cell, attr):
+    try:
+        return min(max(int(cell.get(attr, 1)), 1), MAX_SPAN)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _unique_headers(names):
+    seen = {}
+    headers = []
+    for i, name in enumerate(names):
+        name = name or f"column{i + 1}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        headers.append(name)
+    return headers
+
+
+def _grid(rows):
+    # rows: [(in_thead, [(tag, text, rowspan, colspan), ...]), ...]
+    # Expands row and column spans into a rectangular grid of cell texts
+    grid = []
+    carry = {}
+    for in_thead, cells in rows:
+        values, header_cells = [], []
+        col = 0
+
+        def take_carried():
+            nonlocal col
+            while col in carry:
+                left, text, is_header = carry[col]
+                values.append(text)
+                header_cells.append(is_header)
+                if left == 1:
+                    del carry[col]
+                else:
+                    carry[col][0] -= 1
+                col += 1
+
+        for tag, text, rowspan, colspan in cells:
+            take_carried()
+            for _ in range(colspan):
+                values.append(text)
+                header_cells.append(tag == "th")
+                if rowspan > 1:
+                    carry[col] = [rowspan - 1, text, tag == "th"]
+                col += 1
+        take_carried()
+        while carry and col <= max(carry):
+            if col in carry:
+                take_carried()
+            else:
+                values.append("")
+                header_cells.append(False)
+                col += 1
+        if values:
+            grid.append((in_thead or all(header_cells), values))
+    return grid
+
+
+def _assemble(grid):
+    width = max((len(values) for _, values in grid), default=0)
+    header_rows, rows = [], []
+    for is_header, values in grid:
+        values = values + [""] * (width - len(values))
+        # Header rows only count while they lead the table
+        if is_header and not rows:
+            header_rows.append(values)
+        else:
+            rows.append(values)
+
+    if not header_rows:
+        return [], rows
+    names = []
+    for col in range(width):
+        parts = []
+        for header in header_rows:
+            if header[col] and header[col] not in parts:
+                parts.append(header[col])
+        names.append(" / ".join(parts))
+    return _unique_headers(names), rows
+
+
+def _lxml_rows(table):
+    rows = []
+    for tr in table.iter("tr"):
+        # Rows of nested tables belong to those tables, not this one
+        if next(tr.iterancestors("table"), None) is not table:
+            continue
+        in_thead = tr.getparent() is not None and tr.getparent().tag == "thead"
+        cells = [(cell.tag, "".join(cell.itertext()).strip(), _span(cell, "rowspan"), _span(cell, "colspan"))
+                 for cell in tr.iterchildren("td", "th")]
+        rows.append((in_thead, cells))
+    return rows
+
+
+def _extract_lxml(content):
+    tables = {}
+    position = {}
+    # Only <table> events surface to Python; the rest of the page is parsed in C and discarded
+    for event, elem in etree.iterparse(io.BytesIO(content), events=("start", "end"), tag="table", html=True, recover=True):
+        if event == "start":
+            position[elem] = len(position)
+            continue
+        tables[position[elem]] = _assemble(_grid(_lxml_rows(elem)))
+        if next(elem.iterancestors("table"), None) is None:
+            # Free this table and everything parsed before it
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    return {f"table{i + 1}": tables[i] for i in sorted(tables)}
+
+
+def _bs4_rows(table):
+    rows = []
+    for tr in table.find_all("tr"):
+        if tr.find_parent("table") is not table:
+            continue
+        in_thead = tr.parent is not None and tr.parent.name == "thead"
+        cells = [(cell.name, cell.get_text().strip(), _span(cell, "rowspan"), _span(cell, "colspan"))
+                 for cell in tr.find_all(["td", "th"], recursive=False)]
+        rows.append((in_thead, cells))
+    return rows
+
+
+def _extract_bs4(content):
+    # SoupStrainer keeps BeautifulSoup from building anything outside <table> elements
+    soup = BeautifulSoup(content, "html.parser", parse_only=SoupStrainer("table"))
+    return {f"table{i + 1}": _assemble(_grid(_bs4_rows(table))) for i, table in enumerate(soup.find_all("table"))}
+
+
+def _extract_legacy(content):
+    # The original full-page parse, kept as the benchmark baseline
+    soup = BeautifulSoup(content, "html.parser")
+    result = {}
+    for m, table in enumerate(soup.find_all("table"), start=1):
+        headers = []
+        rows = []
+        for tr in table.find_all("tr"):
+            ths = [th.text.strip() for th in tr.find_all("th")]
+            if ths:
+                headers = ths
+            else:
+                data = [td.text.strip() for td in tr.find_all("td")]
+                if data:
+                    rows.append(data)
+        result["table" + str(m)] = (headers, rows)
+    return result
+
+
+ENGINES = {
+    "lxml": _extract_lxml,
+    "bs4": _extract_bs4,
+    "legacy": _extract_legacy,
+}
+
+
+def extract_tables(content, engine=None):
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    if engine is None:
+        engine = "lxml" if etree is not None else "bs4"
+    return ENGINES[engine](content)
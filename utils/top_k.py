@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+
+# Groups bigger than k are selected one at a time up to this many; past it they are sorted together
+LOOP_GROUPS = 2_000
+
+
+def _require_columns(df, columns):
+    for column in columns:
+        if column not in df.columns:
+            raise ValueError(f"Column '{column}' does not exist.")
+
+
+def _order_key(series, ascending=True):
+    # Numbers whose ascending order is the requested order, and the missing-value mask.
+    # Numbers and dates are used as they are; anything else is ranked through its sorted distinct values
+    missing = series.isna().to_numpy()
+    if ptypes.is_datetime64_any_dtype(series) or ptypes.is_timedelta64_dtype(series):
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+        key = series.to_numpy().view(np.int64)
+    elif ptypes.is_integer_dtype(series) and not ptypes.is_unsigned_integer_dtype(series):
+        key = series.to_numpy(dtype=np.int64, na_value=0)
+    elif ptypes.is_numeric_dtype(series) and not ptypes.is_bool_dtype(series):
+        key = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        key = pd.factorize(series, sort=True)[0].astype(np.int64)
+    if not ascending:
+        # ~x reverses integer order without the overflow -x has at the minimum value
+        key = -key if key.dtype.kind == 'f' else ~key
+    return key, missing
+
+
+def _select(candidates, key, k):
+    # The k best candidates plus every row tied with the k-th, found by partial selection in O(n)
+    if len(candidates) <= k:
+        return candidates
+    values = key[candidates]
+    kth = np.partition(values, k - 1)[k - 1]
+    return candidates[values <= kth]
+
+
+def _ranked(positions, key, tie_keys, groups=None):
+    # Sorts the (few) selected rows: group, value, tie-breakers (missing last), then row order
+    sort_keys = [positions]
+    for tie_key, tie_missing in reversed(tie_keys):
+        sort_keys += [tie_key[positions], tie_missing[positions]]
+    sort_keys.append(key[positions])
+    if groups is not None:
+        sort_keys.append(groups[positions])
+    return positions[np.lexsort(sort_keys)]
+
+
+def _group_codes(df, by):
+    # Groups numbered in order of first appearance; rows with a missing key belong to no group
+    if len(by) == 1:
+        codes, _ = pd.factorize(df[by[0]])
+    else:
+        codes = df.groupby(by, sort=False, dropna=True).ngroup().fillna(-1).to_numpy()
+    return codes.astype(np.int64)
+
+
+def top_k_positions(df, column, k, largest=True, tie_breakers=(), by=()):
+    # Row positions of the k largest (or smallest) values, best first; per group when by is given.
+    # tie_breakers: [(column, ascending), ...] ordering rows with equal values; remaining ties keep row order.
+    # Rows with a missing value in column are never selected
+    k = int(k)
+    if k < 1:
+        raise ValueError("Number of rows must be at least 1.")
+    by = list(by or [])
+    _require_columns(df, [column, *by, *(name for name, _ in tie_breakers)])
+    key, missing = _order_key(df[column], ascending=not largest)
+    tie_keys = [_order_key(df[name], ascending) for name, ascending in tie_breakers]
+    present = np.flatnonzero(~missing)
+
+    if not by:
+        # With tie-breakers every row tied at the boundary is a candidate; the lexsort settles them
+        chosen = _select(present, key, k)
+        return _ranked(chosen, key, tie_keys)[:k]
+
+    codes = _group_codes(df, by)
+    valid = ~missing & (codes >= 0)
+    sizes = np.bincount(codes if valid.all() else codes[valid], minlength=int(codes.max(initial=-1)) + 1)
+    # Groups of at most k rows are kept whole; bigger groups need a selection
+    in_large = (sizes > k)[codes.clip(0)] & valid
+    chosen = [np.flatnonzero(valid & ~in_large)]
+    large_groups = np.flatnonzero(sizes > k)
+    if 0 < len(large_groups) <= LOOP_GROUPS:
+        # Stable grouping of the rows (a radix sort while the codes fit 16 bits), then
+        # partial selection inside each big group
+        narrow = np.int16 if len(sizes) <= np.iinfo(np.int16).max else np.int64
+        if in_large.all():
+            order = np.argsort(codes.astype(narrow), kind='stable')
+        else:
+            order = np.flatnonzero(in_large)
+            order = order[np.argsort(codes[order].astype(narrow), kind='stable')]
+        bounds = np.concatenate([[0], np.cumsum(sizes[large_groups])])
+        chosen += [_select(order[start:stop], key, k) for start, stop in zip(bounds[:-1], bounds[1:])]
+    else:
+        chosen.append(np.flatnonzero(in_large))
+    ranked = _ranked(np.concatenate(chosen), key, tie_keys, codes)
+    # Keep the first k rows of each group in ranked order
+    ranked_codes = codes[ranked]
+    starts = np.flatnonzero(np.r_[True, ranked_codes[1:] != ranked_codes[:-1]])
+    rank = np.arange(len(ranked)) - np.repeat(starts, np.diff(np.r_[starts, len(ranked)]))
+    return ranked[rank < k]
+
+
+def top_k(df, column, k, largest=True, tie_breakers=(), by=()):
+    return df.iloc[top_k_positions(df, column, k, largest, tie_breakers, by)]
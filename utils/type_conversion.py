@@ -0,0 +1,232 @@
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+
+from utils.row_filter import FALSE_WORDS, TRUE_WORDS
+
+TYPES = ["int", "float", "bool", "datetime", "category", "decimal", "str"]
+ERRORS = ["raise", "coerce"]
+# Number and date conventions: thousands separators, decimal mark, and whether dates put the day first
+LOCALES = {
+    "en-US": {"thousands": [","], "decimal": ".", "dayfirst": False},
+    "en-GB": {"thousands": [","], "decimal": ".", "dayfirst": True},
+    "en-IN": {"thousands": [","], "decimal": ".", "dayfirst": True},
+    "de-DE": {"thousands": ["."], "decimal": ",", "dayfirst": True},
+    "fr-FR": {"thousands": [" ", " ", " "], "decimal": ",", "dayfirst": True},
+    "de-CH": {"thousands": ["'", "’"], "decimal": ".", "dayfirst": True},
+}
+CURRENCY = "$€£¥₹"
+INT64_MIN, INT64_MAX = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+SAMPLE_FAILURES = 10
+
+
+@dataclass
+class Conversion:
+    values: pd.Series
+    failed: np.ndarray  # bool per row: had a value that could not be converted
+    target: str
+
+    @property
+    def n_failed(self):
+        return int(self.failed.sum())
+
+    def failures(self, original, limit=SAMPLE_FAILURES):
+        # The most common failing values with how often each occurs and the first row it appears in
+        bad = original[self.failed]
+        if bad.empty:
+            return pd.DataFrame(columns=["value", "count", "first_row"])
+        text = bad.astype(str)
+        counts = text.value_counts(sort=True)
+        first = pd.Series(bad.index, index=text.to_numpy()).groupby(level=0).first()
+        report = pd.DataFrame({"value": counts.index, "count": counts.to_numpy()})
+        report["first_row"] = first.reindex(report["value"]).to_numpy()
+        return report.head(limit)
+
+    def message(self, original):
+        examples = ", ".join(f"'{v}'" for v in self.failures(original, 5)["value"])
+        return (f"{self.n_failed:,} of {int(original.notna().sum()):,} values could not be converted to "
+                f"{self.target}, e.g. {examples}. Fix them first or choose to set them to missing.")
+
+
+def _locale(name):
+    if name not in LOCALES:
+        raise ValueError(f"Unknown locale '{name}'. Use one of: {', '.join(LOCALES)}.")
+    return LOCALES[name]
+
+
+def _text(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    return series.astype(object).where(series.notna(), None).astype(str).str.strip()
+
+
+def _number_text(text, locale):
+    # Rewrites locale formatted numbers as plain "-1234.5" text; returns it and the accounting-negative mask
+    rules = _locale(locale)
+    text = text.str.replace(f"[{CURRENCY}%]", "", regex=True)
+    negative = text.str.fullmatch(r"\(.*\)").fillna(False).astype(bool)  # accounting style (1,234.50)
+    text = text.str.strip("()")
+    for sep in rules["thousands"]:
+        text = text.str.replace(sep, "", regex=False)
+    if rules["decimal"] != ".":
+        text = text.str.replace(rules["decimal"], ".", regex=False)
+    return text.str.replace("−", "-", regex=False), negative
+
+
+def _numbers(series, locale):
+    # Plain numeric columns pass through; text is read with the locale's separators
+    if ptypes.is_bool_dtype(series):
+        return series.astype(np.float64)
+    if ptypes.is_numeric_dtype(series):
+        return series
+    values = None
+    if "." not in _locale(locale)["thousands"]:
+        # Most cells are usually plain numbers already; only the rest need the slower string clean-up
+        raw = series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series
+        values = pd.to_numeric(raw, errors='coerce')
+        retry = values.isna().to_numpy() & series.notna().to_numpy()
+        if not retry.any():
+            return values
+        series = series[retry]
+    cleaned, negative = _number_text(_text(series), locale)
+    parsed = pd.to_numeric(cleaned, errors='coerce')
+    parsed = parsed.where(~negative, -parsed)
+    if values is None:
+        return parsed
+    values = values.astype(np.float64)
+    values[retry] = parsed.astype(np.float64).to_numpy()
+    return values
+
+
+def _exact_int(text):
+    # Whole numbers are read exactly (no float rounding); fractions and values outside int64 fail
+    try:
+        number = Decimal(text)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    if not number.is_finite() or number != number.to_integral_value():
+        return None
+    number = int(number)
+    return number if INT64_MIN <= number <= INT64_MAX else None
+
+
+def _to_int(series, locale):
+    if ptypes.is_bool_dtype(series):
+        values = series.astype("Int64")
+    elif ptypes.is_integer_dtype(series):
+        values = series
+    elif ptypes.is_float_dtype(series):
+        fractional = series.notna() & (series != np.floor(series))
+        return series.where(~fractional).astype("Int64"), fractional
+    else:
+        values = pd.Series(pd.array([None] * len(series), dtype="Int64"), index=series.index)
+        retry = series.notna().to_numpy(copy=True)
+        if "." not in _locale(locale)["thousands"]:
+            # Fast path: plain numbers parse in one vectorized pass. Floats are only trusted below
+            # 2**53, where they hold whole numbers exactly; everything else is re-read as text
+            raw = series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series
+            parsed = pd.to_numeric(raw, errors='coerce')
+            if ptypes.is_integer_dtype(parsed):
+                exact = np.ones(len(series), dtype=bool)
+            else:
+                numbers = parsed.to_numpy(dtype=np.float64, na_value=np.nan)
+                with np.errstate(invalid='ignore'):
+                    exact = (np.abs(numbers) < 2.0 ** 53) & (numbers == np.floor(numbers))
+            if exact.all():
+                return parsed.astype(np.int64), None
+            if exact.any():
+                values[exact] = parsed[exact].astype(np.int64).to_numpy()
+            retry &= ~exact
+        if retry.any():
+            # Each distinct value left is parsed once through Decimal, so 17+ digit IDs stay exact
+            rest = series[retry]
+            cleaned, negative = _number_text(_text(rest), locale)
+            cleaned = cleaned.where(~negative, "-" + cleaned)
+            codes, uniques = pd.factorize(cleaned)
+            parsed = np.array([_exact_int(v) for v in uniques] + [None], dtype=object)
+            values[retry] = pd.array(parsed[codes], dtype="Int64")
+    if values.isna().any():
+        return values.astype("Int64"), None
+    return values.astype(np.int64), None
+
+
+def _to_bool(series, locale):
+    if ptypes.is_bool_dtype(series):
+        return series, None
+    if ptypes.is_numeric_dtype(series):
+        values = series.map({1: True, 0: False})
+    else:
+        words = _text(series).str.lower()
+        values = words.map({**dict.fromkeys(TRUE_WORDS, True), **dict.fromkeys(FALSE_WORDS, False)})
+    if values.isna().any():
+        return values.astype("boolean"), None
+    return values.astype(bool), None
+
+
+def _to_datetime(series, locale, date_format):
+    if ptypes.is_datetime64_any_dtype(series):
+        return series
+    text = _text(series) if not ptypes.is_numeric_dtype(series) else series
+    if date_format:
+        return pd.to_datetime(text, format=date_format, errors='coerce')
+    dayfirst = _locale(locale)["dayfirst"]
+    if not dayfirst or ptypes.is_numeric_dtype(text):
+        return pd.to_datetime(text, errors='coerce', format="mixed")
+    # ISO dates are year-month-day whatever the locale, so they must not be read day first
+    iso = text.str.match(r"\d{4}-\d{1,2}-\d{1,2}").fillna(False).to_numpy(dtype=bool)
+    values = pd.to_datetime(text.where(~iso), errors='coerce', dayfirst=True, format="mixed")
+    if iso.any():
+        values[iso] = pd.to_datetime(text[iso], errors='coerce', format="ISO8601").to_numpy()
+    return values
+
+
+def _to_decimal(series, locale, places):
+    # Decimal keeps exact digits (no float rounding); each distinct value is parsed once
+    if ptypes.is_numeric_dtype(series) and not ptypes.is_bool_dtype(series):
+        text = series.astype(object).where(series.notna(), None).map(lambda v: None if v is None else repr(v))
+    else:
+        text, negative = _number_text(_text(series), locale)
+        text = text.where(~negative, "-" + text)
+    quantum = Decimal(1).scaleb(-int(places)) if places not in (None, "") else None
+
+    def parse(value):
+        try:
+            number = Decimal(value)
+        except (InvalidOperation, TypeError, ValueError):
+            return None
+        if not number.is_finite():
+            return None
+        return number.quantize(quantum) if quantum is not None else number
+
+    codes, uniques = pd.factorize(text)
+    parsed = np.array([parse(v) for v in uniques] + [None], dtype=object)
+    return pd.Series(parsed[codes], index=series.index, dtype=object)
+
+
+def convert(series, to, locale="en-US", date_format="", places=None):
+    # Converts one column; rows that had a value but came out missing are reported as failures
+    if to not in TYPES:
+        raise ValueError(f"Unsupported type '{to}'. Use one of: {', '.join(TYPES)}.")
+    present = series.notna().to_numpy()
+    extra_failed = None
+    if to == "int":
+        values, extra_failed = _to_int(series, locale)
+    elif to == "float":
+        values = _numbers(series, locale).astype(np.float64)
+    elif to == "bool":
+        values, _ = _to_bool(series, locale)
+    elif to == "datetime":
+        values = _to_datetime(series, locale, date_format)
+    elif to == "category":
+        values = series.astype("category")
+    elif to == "decimal":
+        values = _to_decimal(series, locale, places)
+    else:
+        values = series.astype(str)
+    failed = present & values.isna().to_numpy()
+    if extra_failed is not None:
+        failed |= extra_failed.to_numpy(dtype=bool)
+    return Conversion(values, failed, to)
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from utils.dtype_optimizer import is_text, optimize_column, parse_dates
+
+MISSING = ["", "-", "–", "—", "?", "n/a", "N/A", "NA", "na", "None", "null"]
+FOOTNOTE = r"\[[^\]]*\]"  # wiki-style footnote markers such as "[3]" or "[note 1]"
+CURRENCY = "$€£¥₹"
+THOUSANDS = r"[-+]?\d{1,3}(?:,\d{3})+(?:\.\d+)?"
+DECIMAL_COMMA = r"[-+]?\d+,\d+"
+LEADING_ZERO = r"[-+]?0\d"  # codes such as "00123" or ZIP codes lose their zeros as numbers
+
+
+def _to_number(text):
+    is_percent = text.str.endswith("%")
+    is_currency = text.str.contains(f"^[-+−]?[{CURRENCY}]|[{CURRENCY}]$", regex=True)
+    core = text.str.replace(f"[%\\s{CURRENCY}]", "", regex=True).str.replace("−", "-", regex=False)
+    if core.str.match(LEADING_ZERO).any():
+        return None, None
+    # "12%" next to "0.5" could be either scale, so only all-percent columns are numbers
+    if is_percent.any() and not is_percent.all():
+        return None, None
+
+    has_comma = core.str.contains(",", regex=False)
+    is_thousands = core.str.fullmatch(THOUSANDS)
+    if (has_comma & ~is_thousands).any():
+        # Commas that aren't thousands groups can only be decimal commas, and then no dots may appear.
+        # Values that also read as thousands ("1,500") are ambiguous, so the column stays text
+        if not core[has_comma].str.fullmatch(DECIMAL_COMMA).all() or core.str.contains(".", regex=False).any():
+            return None, None
+        if is_thousands.any():
+            return None, None
+        core = core.str.replace(",", ".", regex=False)
+        kind = "decimal comma"
+    else:
+        core = core.str.replace(",", "", regex=False)
+        kind = "thousands" if has_comma.any() else "numeric"
+
+    values = pd.to_numeric(core, errors='coerce')
+    if values.isna().any():
+        return None, None
+    if is_percent.all():
+        # Stored as fractions so "12%" is 0.12, which is what the kind reports
+        values = values / 100
+        kind = "percent (as fraction)"
+    elif is_currency.all():
+        kind = "currency"
+    return values, kind
+
+
+def infer_column(s):
+    if not is_text(s):
+        return s, str(s.dtype)
+    text = s.astype(object).where(s.notna(), "").astype(str).str.replace(FOOTNOTE, "", regex=True).str.strip()
+    present = ~text.isin(MISSING)
+    if not present.any():
+        return s, "empty"
+
+    values, kind = _to_number(text[present])
+    if values is not None:
+        if present.all():
+            return optimize_column(values), kind
+        result = pd.Series(np.nan, index=s.index, dtype=np.float64)
+        result[present] = values
+        return optimize_column(result), kind
+
+    dates = parse_dates(text[present])
+    if dates is not None:
+        result = pd.Series(pd.NaT, index=s.index, dtype=dates.dtype)
+        result[present] = dates
+        return result, "date"
+
+    return optimize_column(text.where(present)), "text"
+
+
+def infer_types(df):
+    # Converts scraped string columns in bulk; returns the detected kind per column
+    kinds = {}
+    for i, col in enumerate(df.columns):
+        converted, kinds[col] = infer_column(df.iloc[:, i])
+        df.isetitem(i, converted)
+    return kinds
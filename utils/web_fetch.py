@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/132.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US, en;q=0.5',
+}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int = None
+    content: bytes = None
+    from_cache: bool = False
+    error: str = None
+
+    @property
+    def ok(self):
+        return self.content is not None and self.error is None
+
+
+class ResponseCache:
+    def __init__(self, root=Path("data/http_cache")):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url):
+        name = hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+        return self.root / f"{name}.json", self.root / f"{name}.body"
+
+    def get(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            return meta, body_path.read_bytes()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, None
+
+    def put(self, url, response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        # Without a validator there is nothing to revalidate against next time
+        if not etag and not last_modified:
+            return
+        meta_path, body_path = self._paths(url)
+        tmp_body = body_path.with_suffix('.tmp')
+        tmp_body.write_bytes(response.content)
+        os.replace(tmp_body, body_path)
+        tmp_meta = meta_path.with_suffix('.tmpjson')
+        with open(tmp_meta, 'w') as f:
+            json.dump({'url': url, 'etag': etag, 'last_modified': last_modified}, f, indent=4)
+        os.replace(tmp_meta, meta_path)
+
+
+class WebFetcher:
+    def __init__(self, cache_dir=Path("data/http_cache"), max_workers=8, per_host=2, timeout=15,
+                 headers=None, session=None):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.cache = ResponseCache(cache_dir)
+        self.session = session or self._make_session(headers or DEFAULT_HEADERS)
+        self._host_limits = {}
+        self._lock = threading.Lock()
+
+    def _make_session(self, headers):
+        session = requests.Session()
+        session.headers.update(headers)
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def fetch(self, url):
+        meta, cached_body = self.cache.get(url)
+        conditional = {}
+        if meta is not None:
+            if meta.get('etag'):
+                conditional['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                conditional['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            with self._host_limit(url):
+                response = self.session.get(url, headers=conditional, timeout=self.timeout)
+        except requests.RequestException as e:
+            return FetchResult(url, error=str(e))
+
+        if response.status_code == 304 and cached_body is not None:
+            return FetchResult(url, status=304, content=cached_body, from_cache=True)
+        if response.status_code != 200:
+            return FetchResult(url, status=response.status_code, error=f"HTTP {response.status_code}")
+        self.cache.put(url, response)
+        return FetchResult(url, status=200, content=response.content)
+
+    def fetch_many(self, urls):
+        # Results come back in the same order as the URLs were given
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as pool:
+            return list(pool.map(self.fetch, urls))
+
+
+web_fetcher = WebFetcher()